@@ -12,10 +12,16 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
+
+from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Settings below can be overridden from the environment or a .env file
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -46,6 +52,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'reading_tracker.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -80,10 +87,81 @@ WSGI_APPLICATION = 'book_analyzer.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE=postgresql selects PostgreSQL; anything else uses SQLite.
+# Connections are kept open for DB_CONN_MAX_AGE seconds and health-checked
+# before reuse, so requests served by WSGI threads (runserver, gunicorn)
+# don't pay for a new connection each time. Under ASGI every request runs
+# its sync ORM code in a new thread, so persistent connections pile up one
+# per thread: set DB_CONN_MAX_AGE=0 there and pool with e.g. PgBouncer.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'book_analyzer'),
+            'USER': os.environ.get('DB_USER', 'book_analyzer'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            # Stock sqlite3 backend plus per-connection PRAGMAs (WAL, etc.)
+            'ENGINE': 'book_analyzer.sqlite_backend',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Seconds to wait on a locked database before raising
+                'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', '5')),
+                'pragmas': {
+                    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', '5')) * 1000,
+                    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+                },
+            },
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# Per-user data versions live in the cache, so every server process must
+# share it: a write handled by one worker has to invalidate the others'
+# entries and ETags. CACHE_BACKEND=file (default) shares a directory
+# between the workers on one host; redis or memcached (with CACHE_LOCATION)
+# also work across hosts. locmem is per process: single-process use only.
+CACHE_BACKENDS = {
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+CACHE_DEFAULT_LOCATIONS = {
+    'file': os.path.join(tempfile.gettempdir(), 'book-analyzer-cache'),
+    'redis': 'redis://127.0.0.1:6379/1',
+    'memcached': '127.0.0.1:11211',
+    'locmem': 'book-analyzer',
+}
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND]),
+        'OPTIONS': {
+            # Ignored by redis; the file and locmem backends cull beyond this
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '10000')),
+        } if CACHE_BACKEND in ('file', 'locmem') else {},
     }
 }
 
@@ -107,6 +185,35 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Logging
+# Per-request metric lines go to the 'reading_tracker.requests' logger at
+# INFO level, which is off unless REQUEST_METRICS_LOG_LEVEL=INFO (the
+# /metrics endpoint has the same numbers aggregated). Debugging detail goes
+# to 'reading_tracker' at DEBUG level.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'reading_tracker': {
+            'handlers': ['console'],
+            'level': os.environ.get('READING_TRACKER_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'reading_tracker.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_METRICS_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -129,6 +236,21 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored once per distinct file content, under a hashed name
+STORAGES = {
+    'default': {
+        'BACKEND': 'reading_tracker.storage.ContentHashStorage',
+    },
+    # Fingerprinted names plus .gz/.br copies, written by collectstatic
+    'staticfiles': {
+        'BACKEND': 'reading_tracker.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Serve collected static files from Django (with precompressed variants and
+# immutable caching). Set SERVE_STATIC=0 when a web server handles /static/.
+SERVE_STATIC = os.environ.get('SERVE_STATIC', '1') == '1'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -140,5 +262,18 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
+# Django REST Framework
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'reading_tracker.pagination.StandardCursorPagination',
+    'PAGE_SIZE': 50,
+}
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = DEBUG  # Only for development
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""SQLite backend that tunes every new connection for concurrent web traffic.
+
+WAL lets readers carry on while a write is in progress, and
+``synchronous=NORMAL`` is durable across application crashes in WAL mode
+while skipping an fsync per commit. The values come from the database's
+``OPTIONS['pragmas']``.
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 268435456,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **params.pop('pragmas', {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
@@ -1,5 +1,25 @@
 from django.contrib import admin
-from .models import UserProfile, Book, ReadingSession, ReadingGoal
+from .models import UserProfile, Book, ReadingSession, ReadingGoal, DailyReadingStat, ReadingStreak, StoredFile, CatalogEntry, LeaderboardEntry
+from . import catalog
+from django.db.models import Q
+from .search import BOOK_INDEX, SESSION_INDEX, matching
+
+class IndexedSearchMixin:
+    """Answer the changelist search box from the full-text indexes.
+
+    ``search_indexes`` maps a lookup on the model to the index it is
+    matched against; a row is found if any of them match. ``search_fields``
+    is kept so the admin still shows the search box.
+    """
+    search_indexes = {}
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        condition = Q()
+        for lookup, index in self.search_indexes.items():
+            condition |= Q(**{f'{lookup}__in': matching(index, search_term).values('pk')})
+        return queryset.filter(condition), False
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -7,22 +27,74 @@ class UserProfileAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'bio')
 
 @admin.register(Book)
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'author', 'user', 'status', 'created_at')
     list_filter = ('status', 'genre')
     search_fields = ('title', 'author', 'isbn')
+    search_indexes = {'pk': BOOK_INDEX}
     date_hierarchy = 'created_at'
 
+    def delete_queryset(self, request, queryset):
+        # Delete one by one so each book's sessions leave the daily rollups
+        for book in queryset:
+            book.delete()
+
 @admin.register(ReadingSession)
-class ReadingSessionAdmin(admin.ModelAdmin):
+class ReadingSessionAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'book', 'pages_read', 'start_time', 'end_time')
     list_filter = ('start_time', 'user')
     search_fields = ('book__title', 'notes')
+    search_indexes = {'pk': SESSION_INDEX, 'book': BOOK_INDEX}
     date_hierarchy = 'start_time'
 
+    def delete_queryset(self, request, queryset):
+        # Delete one by one so book totals and daily rollups stay in step
+        for session in queryset:
+            session.delete()
+
+@admin.register(DailyReadingStat)
+class DailyReadingStatAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'pages', 'seconds_read', 'session_count')
+    list_filter = ('date',)
+    search_fields = ('user__username',)
+    date_hierarchy = 'date'
+
+@admin.register(ReadingStreak)
+class ReadingStreakAdmin(admin.ModelAdmin):
+    list_display = ('user', 'last_run', 'longest_streak', 'last_active_date')
+    search_fields = ('user__username',)
+
 @admin.register(ReadingGoal)
 class ReadingGoalAdmin(admin.ModelAdmin):
     list_display = ('user', 'goal_type', 'target_pages', 'target_books', 'start_date', 'end_date')
     list_filter = ('goal_type', 'start_date')
     search_fields = ('user__username',)
     date_hierarchy = 'start_date'
+
+@admin.register(StoredFile)
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'references', 'created_at')
+    search_fields = ('name',)
+    readonly_fields = ('name', 'size', 'references', 'created_at')
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'board', 'period', 'score')
+    list_filter = ('board', 'period')
+    search_fields = ('user__username',)
+    # Scores are maintained by session writes; edits here would bypass the rank trees
+    readonly_fields = ('user', 'board', 'period', 'score')
+
+@admin.register(CatalogEntry)
+class CatalogEntryAdmin(admin.ModelAdmin):
+    list_display = ('title', 'author', 'isbn13', 'isbn10', 'total_pages', 'genre')
+    search_fields = ('title',)
+    readonly_fields = ('title_key', 'author_key')
+    # Counting millions of rows on every changelist page is slow
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # ISBN or title/author prefix, answered from the catalog's indexes
+        if not search_term.strip():
+            return queryset, False
+        return queryset & catalog.matching(search_term), False
@@ -0,0 +1,109 @@
+"""Reading analytics computed with database aggregation.
+
+Every figure comes from a handful of grouped queries, so the cost does
+not grow with the number of sessions pulled into Python.
+"""
+from datetime import timedelta
+
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import ExtractHour, ExtractWeekDay
+from django.utils import timezone
+
+from .models import Book, DailyReadingStat, ReadingSession
+
+# ExtractWeekDay numbers days from 1 (Sunday) to 7 (Saturday)
+WEEKDAYS = ('Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat')
+HOURS = range(24)
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 1) if duration else 0
+
+
+def build_analytics(user, days=30):
+    """Return the analytics page context for the last ``days`` days."""
+    today = timezone.localdate()
+    start_date = today - timedelta(days=days)
+    sessions = ReadingSession.objects.filter(
+        user=user,
+        start_time__gte=timezone.now() - timedelta(days=days)
+    ).order_by()
+    duration = F('end_time') - F('start_time')
+
+    # Totals in one aggregate
+    totals = sessions.aggregate(
+        total_pages=Sum('pages_read'),
+        total_time=Sum(duration),
+        avg_pages_per_session=Avg('pages_read'),
+        total_sessions=Count('id'),
+    )
+    total_stats = {
+        'total_books': Book.objects.filter(user=user, status='CO').count(),
+        'total_pages': totals['total_pages'] or 0,
+        'total_time': _hours(totals['total_time']),
+        'avg_pages_per_session': round(totals['avg_pages_per_session'] or 0, 1),
+        'total_sessions': totals['total_sessions'],
+    }
+
+    # Hour-of-day x weekday histogram
+    cells = sessions.annotate(
+        hour=ExtractHour('start_time'),
+        weekday=ExtractWeekDay('start_time'),
+    ).values('weekday', 'hour').annotate(
+        sessions=Count('id'),
+        pages=Sum('pages_read'),
+    )
+    grid = [[{'sessions': 0, 'pages': 0} for _ in HOURS] for _ in WEEKDAYS]
+    for cell in cells:
+        grid[cell['weekday'] - 1][cell['hour']] = {'sessions': cell['sessions'], 'pages': cell['pages'] or 0}
+    busiest = max((cell['sessions'] for row in grid for cell in row), default=0)
+    heatmap = [
+        {
+            'label': label,
+            'cells': [
+                dict(cell, hour=hour, alpha=round(0.1 + 0.9 * cell['sessions'] / busiest, 2) if cell['sessions'] else 0.05)
+                for hour, cell in zip(HOURS, row)
+            ],
+        }
+        for label, row in zip(WEEKDAYS, grid)
+    ]
+    hourly_pages = [sum(grid[day][hour]['pages'] for day in range(len(WEEKDAYS))) for hour in HOURS]
+    weekday_pages = [sum(cell['pages'] for cell in row) for row in grid]
+
+    # Per-genre time and pages
+    genre_names = dict(Book._meta.get_field('genre').choices)
+    genre_stats = [
+        {
+            'genre': genre_names.get(row['book__genre'], row['book__genre']),
+            'total_pages': row['total_pages'] or 0,
+            'total_time': _hours(row['total_time']),
+            'book_count': row['book_count'],
+        }
+        for row in sessions.values('book__genre').annotate(
+            total_pages=Sum('pages_read'),
+            total_time=Sum(duration),
+            book_count=Count('book', distinct=True),
+        ).order_by('-total_pages')
+    ]
+
+    # Daily pages straight from the rollup
+    daily_pages = [
+        {'date': day.isoformat(), 'pages': pages}
+        for day, pages in DailyReadingStat.objects.filter(
+            user=user, date__gt=start_date, date__lte=today
+        ).order_by('date').values_list('date', 'pages')
+    ]
+
+    return {
+        'total_stats': total_stats,
+        'heatmap': heatmap,
+        'chart_data': {
+            'hours': [f'{hour:02d}:00' for hour in HOURS],
+            'hourly_pages': hourly_pages,
+            'weekdays': list(WEEKDAYS),
+            'weekday_pages': weekday_pages,
+            'daily_pages': daily_pages,
+        },
+        'genre_stats': genre_stats,
+        'days': days,
+    }
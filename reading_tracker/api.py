@@ -0,0 +1,167 @@
+"""REST API for books, reading sessions and goals.
+
+Every list is cursor-paginated, scoped to the requesting user and
+accepts ``?fields=`` to trim the payload.
+"""
+import csv
+import io
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils.dateparse import parse_date
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser, JSONParser, MultiPartParser
+from rest_framework.response import Response
+
+from .ingest import bulk_add_sessions
+from .models import Book, ReadingSession, ReadingGoal, day_start
+from .pagination import CreatedCursorPagination, StartTimeCursorPagination
+from .serializers import (BookSerializer, ReadingSessionSerializer, ReadingGoalSerializer,
+                          SessionIngestRowSerializer)
+
+MAX_INGEST_ROWS = 5000
+
+
+class CSVParser(BaseParser):
+    """Parse a ``text/csv`` body into a list of row dicts keyed by the header line."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            text = stream.read().decode('utf-8-sig')
+            return list(csv.DictReader(io.StringIO(text)))
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(f'CSV parse error - {exc}')
+
+
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValidationError({name: 'Use the YYYY-MM-DD format.'})
+    return parsed
+
+
+class UserOwnedViewSet(viewsets.ModelViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class BookViewSet(UserOwnedViewSet):
+    """Books, filterable by ``status``, ``genre`` and ``created_after``/``created_before``."""
+    serializer_class = BookSerializer
+    pagination_class = CreatedCursorPagination
+
+    def get_queryset(self):
+        books = Book.objects.filter(user=self.request.user)
+        params = self.request.query_params
+        if params.get('status'):
+            books = books.filter(status__in=params['status'].split(','))
+        if params.get('genre'):
+            books = books.filter(genre__in=params['genre'].split(','))
+        created_after = _date_param(self.request, 'created_after')
+        if created_after:
+            books = books.filter(created_at__date__gte=created_after)
+        created_before = _date_param(self.request, 'created_before')
+        if created_before:
+            books = books.filter(created_at__date__lte=created_before)
+        return books
+
+
+class ReadingSessionViewSet(UserOwnedViewSet):
+    """Sessions, filterable by ``book``, ``status``, ``genre`` and ``start``/``end`` dates."""
+    serializer_class = ReadingSessionSerializer
+    pagination_class = StartTimeCursorPagination
+
+    def get_queryset(self):
+        sessions = ReadingSession.objects.filter(user=self.request.user).select_related('book')
+        params = self.request.query_params
+        if params.get('book'):
+            sessions = sessions.filter(book_id__in=params['book'].split(','))
+        if params.get('status'):
+            sessions = sessions.filter(book__status__in=params['status'].split(','))
+        if params.get('genre'):
+            sessions = sessions.filter(book__genre__in=params['genre'].split(','))
+        start = _date_param(self.request, 'start')
+        if start:
+            sessions = sessions.filter(start_time__gte=day_start(start))
+        end = _date_param(self.request, 'end')
+        if end:
+            sessions = sessions.filter(start_time__lt=day_start(end + timedelta(days=1)))
+        return sessions
+
+    @action(detail=False, methods=['post'], url_path='bulk',
+            parser_classes=[JSONParser, CSVParser, MultiPartParser])
+    def bulk(self, request):
+        """Create a batch of sessions from a JSON list, a CSV body or an uploaded CSV ``file``.
+
+        The whole batch is validated first, including each book's page cap
+        across all rows for that book, then inserted in one transaction.
+        """
+        rows = request.data
+        if 'file' in request.FILES:
+            rows = CSVParser().parse(request.FILES['file'])
+        elif isinstance(rows, dict):
+            rows = rows.get('sessions')
+        if not isinstance(rows, list) or not rows:
+            raise ValidationError({'sessions': 'Send a non-empty list of sessions.'})
+        if len(rows) > MAX_INGEST_ROWS:
+            raise ValidationError({'sessions': f'At most {MAX_INGEST_ROWS} sessions per request.'})
+
+        serializer = SessionIngestRowSerializer(data=rows, many=True)
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.validated_data
+
+        # One query for every referenced book, then check caps across the batch
+        books = Book.objects.filter(user=request.user).in_bulk({row['book'] for row in rows})
+        errors = {}
+        batch_pages = defaultdict(int)
+        for index, row in enumerate(rows):
+            book = books.get(row['book'])
+            if book is None:
+                errors[index] = {'book': 'Unknown book.'}
+                continue
+            batch_pages[book.pk] += row['pages_read']
+        for book_id, pages in batch_pages.items():
+            book = books[book_id]
+            if book.pages_read + pages > book.total_pages:
+                errors.update({
+                    index: {'pages_read': f"Total pages read would exceed book's total pages ({book.total_pages})"}
+                    for index, row in enumerate(rows) if row['book'] == book_id
+                })
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        sessions = [
+            ReadingSession(book_id=row['book'], pages_read=row['pages_read'], start_time=row['start_time'],
+                           end_time=row['end_time'], notes=row['notes'])
+            for row in rows
+        ]
+        book_ids = bulk_add_sessions(request.user, sessions)
+        updated = Book.objects.filter(pk__in=book_ids).values('id', 'pages_read', 'progress', 'status')
+        return Response({'created': len(sessions), 'books': list(updated)}, status=status.HTTP_201_CREATED)
+
+
+class ReadingGoalViewSet(UserOwnedViewSet):
+    """Goals, filterable by ``goal_type`` and overlap with ``start``/``end`` dates."""
+    serializer_class = ReadingGoalSerializer
+    pagination_class = CreatedCursorPagination
+
+    def get_queryset(self):
+        goals = ReadingGoal.objects.filter(user=self.request.user)
+        params = self.request.query_params
+        if params.get('goal_type'):
+            goals = goals.filter(goal_type__in=params['goal_type'].split(','))
+        start = _date_param(self.request, 'start')
+        if start:
+            goals = goals.filter(end_date__gte=start)
+        end = _date_param(self.request, 'end')
+        if end:
+            goals = goals.filter(start_date__lte=end)
+        return goals
@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.models.signals import post_delete, post_migrate
 
 
 class ReadingTrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reading_tracker'
+
+    def ready(self):
+        from .assets import check_vendored_assets, check_vendored_assets_deploy
+        from .leaderboards import entry_deleted
+        from .models import Book, LeaderboardEntry, UserProfile, release_uploads
+        from .search import restore_triggers
+
+        checks.register(check_vendored_assets, checks.Tags.staticfiles)
+        checks.register(check_vendored_assets_deploy, checks.Tags.staticfiles, deploy=True)
+        post_migrate.connect(restore_triggers, sender=self)
+        post_delete.connect(entry_deleted, sender=LeaderboardEntry)
+        for model in (Book, UserProfile):
+            post_delete.connect(release_uploads, sender=model)
@@ -0,0 +1,73 @@
+"""Third-party front-end assets, vendored under ``static/vendor``.
+
+``python manage.py vendor_assets`` downloads the pinned files below so
+they are collected, fingerprinted and compressed with our own static
+files. Until an asset has been vendored, templates fall back to its CDN
+URL so a fresh checkout still renders, and the system checks warn about
+it on every management command (``check --deploy`` fails).
+"""
+from functools import lru_cache
+
+from django.contrib.staticfiles import finders
+from django.core import checks
+
+FONT_AWESOME = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0'
+FONT_AWESOME_FONTS = [
+    f'{name}.{ext}'
+    for name in ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+    for ext in ('woff2', 'ttf')
+]
+
+# name -> (static path, CDN URL, extra files as (static path, URL))
+VENDOR_ASSETS = {
+    'bootstrap-css': (
+        'vendor/bootstrap/bootstrap.min.css',
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+        (),
+    ),
+    'bootstrap-js': (
+        'vendor/bootstrap/bootstrap.bundle.min.js',
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+        (),
+    ),
+    'font-awesome': (
+        'vendor/font-awesome/css/all.min.css',
+        f'{FONT_AWESOME}/css/all.min.css',
+        # all.min.css loads its fonts from ../webfonts/
+        tuple((f'vendor/font-awesome/webfonts/{font}', f'{FONT_AWESOME}/webfonts/{font}') for font in FONT_AWESOME_FONTS),
+    ),
+    'chart.js': (
+        'vendor/chart.js/chart.umd.js',
+        'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js',
+        (),
+    ),
+    'confetti': (
+        'vendor/canvas-confetti/confetti.browser.min.js',
+        'https://cdn.jsdelivr.net/npm/canvas-confetti@1.6.0/dist/confetti.browser.min.js',
+        (),
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def is_vendored(name):
+    return finders.find(VENDOR_ASSETS[name][0]) is not None
+
+
+def _missing_assets(level, id):
+    missing = [name for name in VENDOR_ASSETS if not finders.find(VENDOR_ASSETS[name][0])]
+    if not missing:
+        return []
+    return [level(
+        f'Front-end assets not vendored, pages load them from a CDN: {", ".join(missing)}.',
+        hint='Run "python manage.py vendor_assets", then collectstatic.',
+        id=id,
+    )]
+
+
+def check_vendored_assets(app_configs, **kwargs):
+    return _missing_assets(checks.Warning, 'reading_tracker.W001')
+
+
+def check_vendored_assets_deploy(app_configs, **kwargs):
+    return _missing_assets(checks.Error, 'reading_tracker.E001')
@@ -0,0 +1,121 @@
+"""Drive every reading_tracker URL through the test client and time it.
+
+Each GET-able pattern in ``reading_tracker.urls`` (including the REST
+router) is requested as one user, with ``pk``/``book_id`` filled from that
+user's own objects. Results carry latency percentiles and the SQL query
+count, so the same harness backs the ``benchmark_views`` command and the
+query budgets in ``tests.py``.
+"""
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+
+from . import urls
+from .models import Book, ReadingGoal, ReadingSession
+
+# Patterns that change state on GET, or stream until the client goes away
+SKIP = {'logout', 'dashboard_events'}
+
+# The path segment before <pk> says which model the pk belongs to
+PK_MODELS = {'books': Book, 'sessions': ReadingSession, 'goals': ReadingGoal}
+PK_SEGMENT = re.compile(r'(\w+)/[^/]*\bpk\b')
+
+
+@dataclass
+class ViewTiming:
+    name: str
+    path: str
+    status: int = 0
+    queries: int = 0
+    samples: list = field(default_factory=list)
+
+    def percentile(self, p):
+        if len(self.samples) < 2:
+            return self.samples[0] if self.samples else 0.0
+        return statistics.quantiles(self.samples, n=100, method='inclusive')[p - 1]
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p95(self):
+        return self.percentile(95)
+
+    @property
+    def p99(self):
+        return self.percentile(99)
+
+
+def iter_patterns(patterns=None, prefix=''):
+    """Yield (name, full pattern string, URLPattern) for every named pattern."""
+    for entry in urls.urlpatterns if patterns is None else patterns:
+        if isinstance(entry, URLResolver):
+            yield from iter_patterns(entry.url_patterns, prefix + str(entry.pattern))
+        elif isinstance(entry, URLPattern) and entry.name:
+            yield entry.name, prefix + str(entry.pattern), entry
+
+
+def url_for(user, name, route, pattern):
+    """Reverse ``name`` with kwargs from ``user``'s objects, or None if it can't be filled."""
+    kwargs = {}
+    for kwarg in pattern.pattern.regex.groupindex:
+        if kwarg == 'book_id':
+            model = Book
+        elif kwarg == 'pk':
+            match = PK_SEGMENT.search(route)
+            model = PK_MODELS.get(match.group(1)) if match else None
+        else:
+            return None
+        obj = model.objects.filter(user=user).order_by('pk').first() if model else None
+        if obj is None:
+            return None
+        kwargs[kwarg] = obj.pk
+    return reverse(name, kwargs=kwargs)
+
+
+def targets(user):
+    """(name, path) for every URL the harness can request as ``user``."""
+    seen = set()
+    for name, route, pattern in iter_patterns():
+        if name in SKIP or name in seen:
+            continue
+        path = url_for(user, name, route, pattern)
+        if path is not None:
+            seen.add(name)
+            yield name, path
+
+
+def fetch(client, path):
+    """GET ``path``, reading streamed bodies so their queries are counted."""
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        response = client.get(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - start
+    return response, elapsed, len(queries)
+
+
+def run(user, iterations=20, names=None):
+    """Time every target ``iterations`` times; returns a list of ViewTiming."""
+    client = Client(raise_request_exception=False)
+    client.force_login(user)
+    results = []
+    for name, path in targets(user):
+        if names and name not in names:
+            continue
+        timing = ViewTiming(name, path)
+        for _ in range(iterations):
+            response, elapsed, queries = fetch(client, path)
+            timing.samples.append(elapsed * 1000)
+            timing.status = response.status_code
+            timing.queries = max(timing.queries, queries)
+        results.append(timing)
+    return results
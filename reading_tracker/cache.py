@@ -0,0 +1,163 @@
+"""Per-user caching helpers.
+
+Each user has a data version that is bumped whenever one of their books,
+sessions or goals changes, once the write commits. Cached entries and
+ETags embed that version, so a write makes every older entry unreachable
+without having to find and delete it, and other users' entries are
+untouched. Bumping it also pushes the change to the user's open
+dashboards (see ``live``).
+"""
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.views.decorators.http import condition
+
+from . import live
+
+DASHBOARD_TIMEOUT = 60 * 10
+CHART_TIMEOUT = 60 * 60
+ANALYTICS_TIMEOUT = 60 * 60
+
+
+def _version_key(user_id):
+    return f'reading_tracker:version:{user_id}'
+
+
+def data_version(user_id):
+    """Return the user's current data version."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a version lost to eviction is never reused
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def adata_version(user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def _bump_version(user_id):
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(_version_key(user_id), time.time_ns(), None)
+
+
+def invalidate_user(user_id):
+    """Bump the user's data version once the current transaction commits.
+
+    Bumping any earlier would let a concurrent request cache uncommitted
+    (and possibly rolled back) data under the new version.
+    """
+    transaction.on_commit(lambda: _bump_version(user_id))
+    live.publish(user_id)
+
+
+def get_or_build(user_id, name, build, timeout):
+    """Return the user's cached ``name`` entry for the current data version, building it on a miss."""
+    key = f'reading_tracker:{name}:{user_id}:{data_version(user_id)}'
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
+
+
+async def aget_or_build(user_id, name, build, timeout):
+    """Async ``get_or_build``; ``build`` is a coroutine function."""
+    key = f'reading_tracker:{name}:{user_id}:{await adata_version(user_id)}'
+    value = await cache.aget(key)
+    if value is None:
+        value = await build()
+        await cache.aset(key, value, timeout)
+    return value
+
+
+def dashboard_key(user_id, day=None):
+    # The dashboard shows "days remaining" and the current streak, so it
+    # also goes stale at midnight
+    day = day or timezone.localdate()
+    return f'reading_tracker:dashboard:{user_id}:{data_version(user_id)}:{day.isoformat()}'
+
+
+def get_dashboard(user_id):
+    return cache.get(dashboard_key(user_id))
+
+
+def set_dashboard(user_id, context):
+    cache.set(dashboard_key(user_id), context, DASHBOARD_TIMEOUT)
+
+
+def versioned_json(name):
+    """Serve a per-user JSON payload with ETag revalidation and version-keyed caching.
+
+    The wrapped view returns a plain dict. Requests whose ``If-None-Match``
+    matches the current version get a 304, and the payload itself is only
+    recomputed once per data version. Payloads can cover windows ending
+    today, so the ETag and cache key include the date as well, like
+    ``dashboard_key``. Async views are supported too.
+    """
+    def key(request):
+        return f'chart:{name}:{request.GET.urlencode()}:{timezone.localdate().isoformat()}'
+
+    def tag(request):
+        query = request.GET.urlencode()
+        day = timezone.localdate().isoformat()
+        return f'{name}:{request.user.id}:{data_version(request.user.id)}:{day}:{query}'
+
+    def respond(payload):
+        response = JsonResponse(payload)
+        # Let the browser keep the payload but revalidate it every time
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def async_decorator(view):
+        # django.views.decorators.http.condition is sync-only in Django 5.0,
+        # so do its ETag handling here
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            user_id = request.user.id
+            query = request.GET.urlencode()
+            day = timezone.localdate().isoformat()
+            etag = quote_etag(f'{name}:{user_id}:{await adata_version(user_id)}:{day}:{query}')
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+            payload = await aget_or_build(
+                user_id, key(request),
+                lambda: view(request, *args, **kwargs), CHART_TIMEOUT)
+            response = respond(payload)
+            response.headers.setdefault('ETag', etag)
+            return response
+
+        return wrapper
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return async_decorator(view)
+
+        def etag(request, *args, **kwargs):
+            return tag(request)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            payload = get_or_build(
+                request.user.id, key(request),
+                lambda: view(request, *args, **kwargs), CHART_TIMEOUT)
+            return respond(payload)
+
+        return condition(etag_func=etag)(wrapper)
+    return decorator
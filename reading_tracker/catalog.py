@@ -0,0 +1,260 @@
+"""Offline book metadata: ISBN lookup and title/author autocomplete.
+
+``CatalogEntry`` rows are loaded from an open bibliographic dump by the
+``load_catalog`` command. Lookups go through per-process LRU caches, so
+a popular ISBN or prefix costs one indexed query per process. Call
+``clear_cache()`` after loading; other running processes pick up new
+entries when they restart.
+"""
+import csv
+import json
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .importers import map_genre
+from .models import CatalogEntry
+
+LOOKUP_CACHE_SIZE = getattr(settings, 'CATALOG_LOOKUP_CACHE_SIZE', 4096)
+AUTOCOMPLETE_CACHE_SIZE = getattr(settings, 'CATALOG_AUTOCOMPLETE_CACHE_SIZE', 4096)
+AUTOCOMPLETE_LIMIT = 10
+# Shorter prefixes match too much of a large catalog to be useful
+MIN_PREFIX = 2
+
+WORD = re.compile(r'\w+')
+LEADING_ARTICLE = re.compile(r'^(the|a|an) ')
+# Sorts after every other character, closing the range for a prefix scan
+PREFIX_END = '\U0010ffff'
+
+FIELDS = ('isbn13', 'isbn10', 'title', 'author', 'total_pages', 'genre')
+# Column order of the rows built by the parsers
+COLUMNS = FIELDS + ('title_key', 'author_key')
+
+
+# ISBNs
+
+def _isbn10_check(digits):
+    total = sum((10 - i) * int(d) for i, d in enumerate(digits[:9]))
+    check = (11 - total % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def _isbn13_check(digits):
+    total = sum((3 if i % 2 else 1) * int(d) for i, d in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def clean_isbn(value):
+    """Digits (and a trailing X) of ``value`` if they form a valid ISBN-10 or -13, else ''."""
+    isbn = re.sub(r'[^0-9X]', '', (value or '').upper())
+    if len(isbn) == 10 and isbn[:9].isdigit() and isbn[9] == _isbn10_check(isbn):
+        return isbn
+    if len(isbn) == 13 and isbn.isdigit() and isbn[12] == _isbn13_check(isbn):
+        return isbn
+    return ''
+
+
+def to_isbn13(isbn):
+    if len(isbn) == 13:
+        return isbn
+    digits = '978' + isbn[:9]
+    return digits + _isbn13_check(digits)
+
+
+def to_isbn10(isbn):
+    """The ISBN-10 for a 978- ISBN-13; 979- ISBNs have none."""
+    if len(isbn) == 10:
+        return isbn
+    if not isbn.startswith('978'):
+        return ''
+    return isbn[3:12] + _isbn10_check(isbn[3:12])
+
+
+def prefix_key(text):
+    """Lowercase ASCII words of ``text`` without a leading article: 'The Hobbit' -> 'hobbit'."""
+    folded = text or ''
+    if not folded.isascii():
+        folded = unicodedata.normalize('NFKD', folded)
+        folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    words = ' '.join(WORD.findall(folded.lower()))
+    return LEADING_ARTICLE.sub('', words)[:200]
+
+
+# Lookups
+
+def _as_dict(entry):
+    return {field: getattr(entry, field) for field in FIELDS}
+
+
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def _lookup(isbn):
+    lookup = {'isbn13': isbn} if len(isbn) == 13 else {'isbn10': isbn}
+    entry = CatalogEntry.objects.filter(**lookup).first()
+    return _as_dict(entry) if entry else None
+
+
+def lookup_isbn(value):
+    """Catalog metadata for an ISBN-10 or ISBN-13 as a dict, or None."""
+    isbn = clean_isbn(value)
+    if not isbn:
+        return None
+    entry = _lookup(isbn)
+    return dict(entry) if entry else None
+
+
+def _prefix(field, key):
+    return {f'{field}__gte': key, f'{field}__lt': key + PREFIX_END}
+
+
+@lru_cache(maxsize=AUTOCOMPLETE_CACHE_SIZE)
+def _autocomplete(key, limit):
+    entries = list(CatalogEntry.objects.filter(**_prefix('title_key', key)).order_by('title_key')[:limit])
+    if len(entries) < limit:
+        seen = {entry.pk for entry in entries}
+        by_author = CatalogEntry.objects.filter(**_prefix('author_key', key)).order_by('author_key')
+        entries += [entry for entry in by_author[:limit] if entry.pk not in seen][:limit - len(entries)]
+    return tuple(_as_dict(entry) for entry in entries)
+
+
+def autocomplete(query, limit=AUTOCOMPLETE_LIMIT):
+    """Up to ``limit`` entries whose title, then author, starts with ``query``."""
+    key = prefix_key(query)
+    if len(key) < MIN_PREFIX:
+        return []
+    return [dict(entry) for entry in _autocomplete(key, limit)]
+
+
+def matching(query):
+    """Entries with the ISBN in ``query``, or whose title or author starts with it."""
+    isbn = clean_isbn(query)
+    if isbn:
+        return CatalogEntry.objects.filter(isbn13=to_isbn13(isbn))
+    key = prefix_key(query)
+    if not key:
+        return CatalogEntry.objects.none()
+    return CatalogEntry.objects.filter(Q(**_prefix('title_key', key)) | Q(**_prefix('author_key', key)))
+
+
+def clear_cache():
+    _lookup.cache_clear()
+    _autocomplete.cache_clear()
+
+
+# Loading
+
+def _first(row, *names):
+    for name in names:
+        value = row.get(name)
+        if value:
+            return value.strip()
+    return ''
+
+
+def _pages(value):
+    try:
+        pages = int(float(value))
+    except (TypeError, ValueError):
+        return None
+    return pages if pages > 0 else None
+
+
+def _entry(isbn, title, author, pages, subjects):
+    """One row in ``COLUMNS`` order, or None if there is no valid ISBN or title."""
+    isbn = clean_isbn(isbn)
+    title = ' '.join(title.split())[:200]
+    if not isbn or not title:
+        return None
+    author = ' '.join(author.split())[:200]
+    isbn13 = to_isbn13(isbn)
+    genre = map_genre(subjects) if subjects else ''
+    return (isbn13, to_isbn10(isbn13), title, author, _pages(pages), genre, prefix_key(title), prefix_key(author))
+
+
+def parse_csv(lines):
+    """Catalog rows from a CSV with a header row, e.g. the Goodreads books dataset.
+
+    Column names are matched loosely (``isbn13``/``isbn``, ``authors``,
+    ``num_pages``, ``genres``...); multiple authors keep the first one.
+    """
+    reader = csv.DictReader(lines)
+    for record in reader:
+        record = {(key or '').strip().lower(): value for key, value in record.items()}
+        author = re.split(r'[/;]', _first(record, 'author', 'authors'))[0]
+        row = _entry(
+            _first(record, 'isbn13', 'isbn_13', 'isbn', 'isbn10', 'isbn_10'),
+            _first(record, 'title'),
+            author,
+            _first(record, 'num_pages', 'pages', 'number_of_pages', 'number of pages'),
+            _first(record, 'genre', 'genres', 'subjects', 'categories'),
+        )
+        if row:
+            yield row
+
+
+def parse_openlibrary(lines):
+    """Catalog rows from an Open Library editions dump (type, key, revision, modified, JSON).
+
+    Editions only reference their authors by key, so the author comes
+    from the edition's ``by_statement`` when it has one.
+    """
+    for line in lines:
+        columns = line.rstrip('\n').split('\t')
+        if len(columns) < 5:
+            continue
+        try:
+            record = json.loads(columns[4])
+        except ValueError:
+            continue
+        isbn = (record.get('isbn_13') or record.get('isbn_10') or [''])[0]
+        title = record.get('title') or ''
+        if record.get('subtitle'):
+            title = f"{title}: {record['subtitle']}"
+        author = re.sub(r'^by\s+|[.;,\s]+$', '', record.get('by_statement') or '', flags=re.IGNORECASE)
+        row = _entry(isbn, title, author, record.get('number_of_pages'), ', '.join(record.get('subjects') or []))
+        if row:
+            yield row
+
+
+PARSERS = {'csv': parse_csv, 'openlibrary': parse_openlibrary}
+
+
+def _upsert_sql():
+    table = CatalogEntry._meta.db_table
+    updates = ', '.join(f'{column} = excluded.{column}' for column in COLUMNS[1:])
+    return (f"INSERT INTO {table} ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))}) "
+            f"ON CONFLICT (isbn13) DO UPDATE SET {updates}")
+
+
+def load(rows, batch_size=5000, progress=None):
+    """Upsert parsed rows by ISBN-13 in batches; returns the number written.
+
+    Rows go straight to ``executemany`` rather than through model
+    instances, which is several times faster for dumps with millions of
+    editions. Both SQLite and PostgreSQL accept the ON CONFLICT clause.
+    """
+    sql = _upsert_sql()
+    written = 0
+    batch = {}
+
+    def flush():
+        nonlocal written
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, list(batch.values()))
+        written += len(batch)
+        batch.clear()
+        if progress:
+            progress(written)
+
+    for row in rows:
+        # Last one wins when a dump repeats an ISBN within a batch
+        batch[row[0]] = row
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    clear_cache()
+    return written
@@ -0,0 +1,96 @@
+"""Dashboard chart datasets.
+
+The queries and the shaping of their rows are kept apart so the same
+datasets can be built from sync code (the dashboard page) and from the
+async JSON endpoints.
+"""
+import asyncio
+import math
+
+from django.db.models import Count, Sum
+
+from .models import Book, ReadingSession
+
+GENRE_COLORS = ['#36A2EB', '#4BC0C0', '#FF9F40', '#FF6384', '#9966FF', '#FFCD56']
+
+# Database status code -> position in the status chart
+STATUS_LABELS = ['Completed', 'Currently Reading', 'Abandoned']
+STATUS_COLORS = ['#4BC0C0', '#FF9F40', '#FF6384']  # Green, Orange, Red
+STATUS_INDEX = {'CO': 0, 'CR': 1, 'AB': 2}
+
+# Enough points for a readable line chart on any screen
+MAX_SERIES_POINTS = 120
+
+
+def genre_counts(user):
+    return Book.objects.filter(user=user).values('genre').annotate(count=Count('id')).order_by('-count')
+
+
+def status_counts(user):
+    return Book.objects.filter(user=user).values('status').annotate(count=Count('status')).order_by()
+
+
+def genre_chart(rows):
+    genre_names = dict(Book._meta.get_field('genre').choices)
+    labels = [genre_names[row['genre']] for row in rows]
+    return {
+        'labels': labels,
+        'data': [row['count'] for row in rows],
+        'colors': GENRE_COLORS[:len(labels)]
+    }
+
+
+def status_chart(rows):
+    counts = [0] * len(STATUS_LABELS)
+    for row in rows:
+        if row['status'] in STATUS_INDEX:
+            counts[STATUS_INDEX[row['status']]] = row['count']
+    return {
+        'labels': STATUS_LABELS,
+        'counts': counts,
+        'colors': STATUS_COLORS
+    }
+
+
+def dashboard_charts(user):
+    """Every dashboard chart dataset, for embedding in the page."""
+    return {
+        'genres': genre_chart(list(genre_counts(user))),
+        'status': status_chart(list(status_counts(user))),
+    }
+
+
+async def alist(queryset):
+    return [row async for row in queryset]
+
+
+async def adashboard_charts(user):
+    genre_rows, status_rows = await asyncio.gather(alist(genre_counts(user)), alist(status_counts(user)))
+    return {
+        'genres': genre_chart(genre_rows),
+        'status': status_chart(status_rows),
+    }
+
+
+def book_session_series(book, max_points=MAX_SERIES_POINTS):
+    """Pages read per day for one book, merged into at most ``max_points`` buckets.
+
+    Sessions are summed per day in the database; if that is still too many
+    points, consecutive days are merged into equal-sized buckets labelled
+    with their first day.
+    """
+    days = list(
+        ReadingSession.objects.filter(book=book).order_by()
+        .values_list('start_time__date').annotate(pages=Sum('pages_read')).order_by('start_time__date')
+    )
+    if len(days) > max_points:
+        size = math.ceil(len(days) / max_points)
+        days = [
+            (days[i][0], sum(pages for _, pages in days[i:i + size]))
+            for i in range(0, len(days), size)
+        ]
+    return {
+        'dates': [day.strftime('%Y-%m-%d') for day, _ in days],
+        'pages': [pages for _, pages in days],
+        'log_pages': [round(math.log1p(pages), 2) for _, pages in days],
+    }
@@ -0,0 +1,19 @@
+from functools import wraps
+
+from django.contrib.auth.views import redirect_to_login
+
+
+def alogin_required(view):
+    """``login_required`` for async views (Django 5.0's only wraps sync views).
+
+    The user is loaded with ``request.auser()`` and put back on
+    ``request.user``, so the view can read it without a sync query.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
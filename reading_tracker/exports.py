@@ -0,0 +1,91 @@
+"""Streaming export of a user's reading history.
+
+Rows are pulled with ``values_list(...).iterator(chunk_size=...)`` and
+written out as they arrive, so memory use does not depend on how much
+history the user has. Under ASGI the line generators are wrapped with
+``aiterate``; Django would otherwise read a sync iterator into a list
+before sending the first byte.
+"""
+import csv
+import itertools
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Book, ReadingSession, ReadingGoal
+
+CHUNK_SIZE = 2000
+
+TABLES = {
+    'books': (Book, ('id', 'title', 'author', 'isbn', 'total_pages', 'genre', 'status',
+                     'pages_read', 'progress', 'created_at', 'updated_at')),
+    'sessions': (ReadingSession, ('id', 'book_id', 'pages_read', 'start_time', 'end_time', 'notes', 'created_at')),
+    'goals': (ReadingGoal, ('id', 'goal_type', 'target_pages', 'target_books', 'start_date', 'end_date', 'created_at')),
+}
+
+
+def _rows(user, table):
+    model, columns = TABLES[table]
+    return model.objects.filter(user=user).order_by('pk').values_list(*columns).iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object whose write() hands back the line for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(user, table):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(TABLES[table][1])
+    for row in _rows(user, table):
+        yield writer.writerow(row)
+
+
+def ndjson_lines(user, tables):
+    encoder = DjangoJSONEncoder()
+    for table in tables:
+        columns = TABLES[table][1]
+        record_type = table[:-1]
+        for row in _rows(user, table):
+            record = dict(zip(columns, row))
+            record['type'] = record_type
+            yield encoder.encode(record) + '\n'
+
+
+def gzip_stream(chunks, flush_every=64 * 1024):
+    """Gzip-compress an iterable of strings on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        pending += len(chunk)
+        if data:
+            yield data
+        elif pending >= flush_every:
+            # Keep bytes flowing to the client for very compressible data
+            yield compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+    yield compressor.flush()
+
+
+async def aiterate(chunks, batch=CHUNK_SIZE):
+    """Iterate a sync generator asynchronously, ``batch`` chunks per trip to a worker thread.
+
+    The generator runs its queries in the request's thread-sensitive
+    worker, like any sync ORM code under ASGI.
+    """
+    chunks = iter(chunks)
+
+    def take():
+        return list(itertools.islice(chunks, batch))
+
+    while True:
+        items = await sync_to_async(take)()
+        if not items:
+            return
+        for item in items:
+            yield item
@@ -1,6 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from .catalog import lookup_isbn
+from .images import validate_image_upload
 from .models import UserProfile, Book, ReadingSession, ReadingGoal
 
 class UserRegistrationForm(UserCreationForm):
@@ -15,7 +17,15 @@ class UserProfileForm(forms.ModelForm):
         model = UserProfile
         fields = ['is_public', 'bio', 'profile_picture']
 
+    def clean_profile_picture(self):
+        picture = self.cleaned_data.get('profile_picture')
+        validate_image_upload(picture)
+        return picture
+
 class BookForm(forms.ModelForm):
+    # Left blank, these are filled in from the offline catalog by ISBN
+    CATALOG_FIELDS = ('title', 'author', 'total_pages', 'genre')
+
     class Meta:
         model = Book
         fields = ['title', 'author', 'isbn', 'total_pages', 'genre', 'status', 'cover_image']
@@ -28,22 +38,46 @@ class BookForm(forms.ModelForm):
             'total_pages': forms.NumberInput(attrs={'class': 'form-control', 'min': '1'}),
             'cover_image': forms.FileInput(attrs={'class': 'form-control'})
         }
+        help_texts = {
+            'isbn': 'Enter an ISBN to fill in the title, author, pages and genre from the catalog.',
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.CATALOG_FIELDS:
+            self.fields[name].required = False
+
+    def clean_cover_image(self):
+        cover = self.cleaned_data.get('cover_image')
+        validate_image_upload(cover)
+        return cover
 
     def clean_total_pages(self):
         total_pages = self.cleaned_data.get('total_pages')
-        if total_pages <= 0:
+        if total_pages is not None and total_pages <= 0:
             raise forms.ValidationError("Total pages must be greater than 0.")
         return total_pages
 
     def clean_isbn(self):
         isbn = self.cleaned_data.get('isbn')
         if isbn:
-            # Remove any hyphens or spaces from ISBN
-            isbn = ''.join(c for c in isbn if c.isdigit())
-            if len(isbn) not in [10, 13]:
+            # Remove any hyphens or spaces from ISBN; an ISBN-10 may end in X
+            isbn = ''.join(c for c in isbn.upper() if c.isdigit() or c == 'X')
+            if len(isbn) not in [10, 13] or 'X' in isbn[:-1] or (len(isbn) == 13 and 'X' in isbn):
                 raise forms.ValidationError("ISBN must be 10 or 13 digits.")
         return isbn
 
+    def clean(self):
+        cleaned_data = super().clean()
+        missing = [name for name in self.CATALOG_FIELDS if not cleaned_data.get(name) and name not in self.errors]
+        entry = lookup_isbn(cleaned_data.get('isbn')) if missing else None
+        for name in missing:
+            if entry and entry.get(name):
+                cleaned_data[name] = entry[name]
+            else:
+                self.add_error(name, forms.ValidationError(self.fields[name].error_messages['required'], code='required'))
+        return cleaned_data
+
 class ReadingSessionForm(forms.ModelForm):
     class Meta:
         model = ReadingSession
@@ -123,4 +157,18 @@ class ReadingGoalForm(forms.ModelForm):
             elif goal_type == 'Y' and duration > 366:
                 raise forms.ValidationError("Yearly goals cannot exceed 366 days.")
         
-        return cleaned_data 
\ No newline at end of file
+        return cleaned_data
+
+
+class LibraryImportForm(forms.Form):
+    file = forms.FileField(
+        label='Export file',
+        help_text='A CSV export from Goodreads or StoryGraph.',
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'})
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data.get('file')
+        if upload and not upload.name.lower().endswith('.csv'):
+            raise forms.ValidationError("Please upload a .csv file.")
+        return upload
@@ -0,0 +1,63 @@
+"""Set-based evaluation of reading goals.
+
+Instead of each ``ReadingGoal`` querying its own period, all of a user's
+goals are evaluated together: one conditional aggregate over the daily
+rollup for pages, and one over completed books for book counts.
+"""
+import math
+from datetime import timedelta
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import Book, DailyReadingStat, day_start
+
+
+def _percent(done, target):
+    return min(round(done / target * 100, 1), 100) if target and target > 0 else 0
+
+
+def evaluate_goals(user, goals, today=None):
+    """Attach progress figures to every goal in ``goals`` and return them as a list.
+
+    Each goal gains ``pages_read``, ``books_completed``, ``progress_percent``,
+    ``books_progress_percent``, ``days_remaining``, ``pages_remaining``,
+    ``pages_needed_per_day`` and ``books_remaining`` attributes (the
+    percentages leave the ``progress()`` methods they replace intact).
+    """
+    goals = list(goals)
+    if not goals:
+        return goals
+    today = today or timezone.localdate()
+
+    pages = DailyReadingStat.objects.filter(user=user).aggregate(**{
+        f'goal_{goal.pk}': Sum('pages', filter=Q(date__gte=goal.start_date, date__lte=goal.end_date))
+        for goal in goals
+    })
+
+    # Same rule as ReadingGoal.get_books_completed_in_period: completed books
+    # with at least one session inside the goal period
+    books_goals = [goal for goal in goals if goal.target_books]
+    books = {}
+    if books_goals:
+        books = Book.objects.filter(user=user, status='CO').aggregate(**{
+            f'goal_{goal.pk}': Count('id', distinct=True, filter=Q(
+                readingsession__start_time__gte=day_start(goal.start_date),
+                readingsession__start_time__lt=day_start(goal.end_date + timedelta(days=1)),
+            ))
+            for goal in books_goals
+        })
+
+    for goal in goals:
+        goal.pages_read = pages[f'goal_{goal.pk}'] or 0
+        goal.books_completed = books.get(f'goal_{goal.pk}') or 0
+
+        goal.days_remaining = (goal.end_date - today).days
+        goal.pages_remaining = max(0, goal.target_pages - goal.pages_read)
+        goal.books_remaining = max(0, goal.target_books - goal.books_completed) if goal.target_books else 0
+        goal.pages_needed_per_day = (
+            math.ceil(goal.pages_remaining / goal.days_remaining) if goal.days_remaining > 0 else 0)
+
+        goal.progress_percent = _percent(goal.pages_read, goal.target_pages)
+        goal.books_progress_percent = _percent(goal.books_completed, goal.target_books)
+    return goals
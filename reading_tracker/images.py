@@ -0,0 +1,135 @@
+"""Resized WebP/JPEG derivatives for uploaded cover and profile images.
+
+Each original at ``<dir>/<name>.<ext>`` gets one file per size and format at
+``<dir>/derivatives/<name>.<ext>.<size>.<webp|jpg>``. Because the paths are
+derived from the original's name, templates can build URLs without
+touching storage.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Refuse to decode anything larger than this many pixels or bytes
+MAX_PIXELS = getattr(settings, 'IMAGE_MAX_PIXELS', 40_000_000)
+MAX_UPLOAD_BYTES = getattr(settings, 'IMAGE_MAX_UPLOAD_BYTES', 15 * 1024 * 1024)
+Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+
+# (width, height, crop) per size; covers are 2:3, profile pictures square
+COVER_SIZES = {'thumb': (240, 360, False), 'medium': (480, 720, False)}
+AVATAR_SIZES = {'thumb': (150, 150, True), 'medium': (300, 300, True)}
+ALL_SIZES = {**COVER_SIZES, **AVATAR_SIZES}
+
+FORMATS = {'webp': ('WEBP', {'quality': 80, 'method': 4}), 'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True})}
+
+
+def derivative_name(name, size, ext):
+    # Keep the original extension so cover.png and cover.jpg don't collide
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, 'derivatives', f'{filename}.{size}.{ext}')
+
+
+def derivative_url(fieldfile, size, ext='jpg'):
+    if not fieldfile:
+        return ''
+    return fieldfile.storage.url(derivative_name(fieldfile.name, size, ext))
+
+
+def srcset(fieldfile, sizes, ext):
+    return ', '.join(f'{derivative_url(fieldfile, size, ext)} {width}w' for size, (width, _, _) in sizes.items())
+
+
+def open_limited(fileobj):
+    """Open an image and check its size before any pixel data is decoded."""
+    try:
+        image = Image.open(fileobj)
+    except Image.DecompressionBombError:
+        raise ValidationError('Image is too large.')
+    except (OSError, SyntaxError):
+        raise ValidationError('Upload a valid image.')
+    width, height = image.size
+    if width * height > MAX_PIXELS:
+        raise ValidationError(f'Image is too large ({width}×{height}).')
+    return image
+
+
+def validate_image_upload(upload):
+    """Form validator: reject oversized files and images before they are saved."""
+    if not isinstance(upload, UploadedFile):
+        return
+    if upload.size > MAX_UPLOAD_BYTES:
+        raise ValidationError(f'Image files may be at most {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.')
+    position = upload.tell()
+    open_limited(upload)
+    upload.seek(position)
+
+
+def _resize(image, width, height, crop):
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', image.size, 'white')
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    elif image.mode == 'L':
+        image = image.convert('RGB')
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.LANCZOS)
+    image.thumbnail((width, height), Image.LANCZOS)
+    return image
+
+
+def has_derivatives(fieldfile, sizes):
+    storage = fieldfile.storage
+    return all(storage.exists(derivative_name(fieldfile.name, size, ext)) for size in sizes for ext in FORMATS)
+
+
+def generate_derivatives(fieldfile, sizes, force=True):
+    """Write every size and format for ``fieldfile``; returns False if the image can't be read.
+
+    With ``force=False`` an image that already has all its derivatives is
+    left alone, which is always safe for content-addressed names.
+    """
+    if not fieldfile:
+        return False
+    storage = fieldfile.storage
+    if not force and has_derivatives(fieldfile, sizes):
+        return True
+    try:
+        with storage.open(fieldfile.name, 'rb') as source:
+            original = open_limited(source)
+            # Let the JPEG decoder downscale by a power of two while decoding,
+            # so a 4K wallpaper never gets decoded at full resolution
+            largest = max(max(width, height) for width, height, _ in sizes.values())
+            original.draft('RGB', (largest, largest))
+            original.load()
+    except (ValidationError, OSError) as exc:
+        logger.warning("Skipping derivatives for %s: %s", fieldfile.name, exc)
+        return False
+
+    for size, (width, height, crop) in sizes.items():
+        resized = _resize(original.copy(), width, height, crop)
+        for ext, (fmt, options) in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, fmt, **options)
+            name = derivative_name(fieldfile.name, size, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+    return True
+
+
+def delete_derivatives(name, sizes, storage=default_storage):
+    for size in sizes:
+        for ext in FORMATS:
+            derivative = derivative_name(name, size, ext)
+            if storage.exists(derivative):
+                storage.delete(derivative)
@@ -0,0 +1,44 @@
+"""Bulk creation of reading sessions.
+
+``ReadingSession.save()`` keeps book totals, daily rollups and streaks
+in step one row at a time. For batches, the sessions are inserted with
+``bulk_create`` and every derived value is updated once per book, once
+per day and once per user instead.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_user
+from .models import Book, DailyReadingStat, ReadingSession, ReadingStreak
+
+
+def bulk_add_sessions(user, sessions, batch_size=500, update_books=True):
+    """Insert unsaved sessions belonging to ``user`` and update everything derived from them.
+
+    The sessions must already be validated. Pass ``update_books=False`` when
+    the books were created with their page totals already set. Returns the
+    ids of the books that were touched.
+    """
+    book_pages = defaultdict(int)
+    daily = defaultdict(lambda: [0, 0, 0])
+    for session in sessions:
+        session.user_id = user.pk
+        book_pages[session.book_id] += session.pages_read
+        day = daily[timezone.localdate(session.start_time)]
+        day[0] += session.pages_read
+        day[1] += int((session.end_time - session.start_time).total_seconds())
+        day[2] += 1
+
+    with transaction.atomic():
+        ReadingSession.objects.bulk_create(sessions, batch_size=batch_size)
+        if update_books:
+            for book_id, pages in book_pages.items():
+                Book.objects.filter(pk=book_id).update(**Book.pages_read_update(pages))
+        for day, (pages, seconds, count) in daily.items():
+            DailyReadingStat.record(user.pk, day, pages=pages, seconds=seconds, sessions=count)
+        if sessions:
+            ReadingStreak.refresh(user.pk)
+    invalidate_user(user.pk)
+    return list(book_pages)
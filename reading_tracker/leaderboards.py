@@ -0,0 +1,256 @@
+"""Community leaderboards for public profiles.
+
+Each board (pages this week, month and year, and longest streak) keeps
+one ``LeaderboardEntry`` per public profile with a non-zero score,
+updated incrementally as sessions and streaks are written. Top-N pages
+read the entries in index order.
+
+For "your position", every board and period also has a Fenwick tree
+of entry counts by score, stored as ``LeaderboardCount`` rows. A rank is
+one plus the number of entries scoring higher, which the tree answers by
+reading at most ``log2(MAX_SCORE)`` rows instead of counting entries.
+Moving a score touches the same number of rows, and usually far fewer,
+since the old and new paths share most nodes.
+
+Page boards are kept for the current and the previous period only;
+sessions back-dated further than that don't move any board. Older
+periods are deleted by ``prune``; run the ``prune_leaderboards`` command
+daily (``rebuild`` starts from empty boards, so it drops them too).
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import DailyReadingStat, LeaderboardCount, LeaderboardEntry, ReadingStreak, UserProfile
+from .streaks import EPOCH
+
+PAGE_BOARDS = ('week', 'month', 'year')
+STREAK_BOARD = 'streak'
+BOARDS = dict(LeaderboardEntry.BOARDS)
+
+# Scores are capped so every tree has the same fixed size
+TREE_SIZE = 2 ** 20
+MAX_SCORE = TREE_SIZE - 1
+
+
+def period_start(board, day):
+    if board == 'week':
+        return day - timedelta(days=day.weekday())
+    if board == 'month':
+        return day.replace(day=1)
+    if board == 'year':
+        return day.replace(month=1, day=1)
+    return EPOCH
+
+
+def period_end(board, start):
+    """First day after the period starting on ``start``."""
+    if board == 'week':
+        return start + timedelta(days=7)
+    if board == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start.replace(year=start.year + 1)
+
+
+def previous_period(board, start):
+    if board == 'week':
+        return start - timedelta(days=7)
+    if board == 'streak':
+        return EPOCH
+    return period_start(board, start - timedelta(days=1))
+
+
+def tracked_periods(board, today=None):
+    """The current and previous period of ``board``, newest first."""
+    current = period_start(board, today or timezone.localdate())
+    return current, previous_period(board, current)
+
+
+# Fenwick tree
+
+def _update_nodes(score):
+    index = score + 1
+    while index <= TREE_SIZE:
+        yield index
+        index += index & -index
+
+
+def _prefix_nodes(score):
+    index = score + 1
+    while index > 0:
+        yield index
+        index -= index & -index
+
+
+def _move(board, period, old, new):
+    """Adjust the tree for one entry moving from score ``old`` to ``new`` (0 = absent)."""
+    deltas = {}
+    if old > 0:
+        for node in _update_nodes(old):
+            deltas[node] = deltas.get(node, 0) - 1
+    if new > 0:
+        for node in _update_nodes(new):
+            deltas[node] = deltas.get(node, 0) + 1
+    rows = [(board, period, node, delta) for node, delta in deltas.items() if delta]
+    if not rows:
+        return
+    table = LeaderboardCount._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} (board, period, node, count) VALUES (%s, %s, %s, %s) '
+            f'ON CONFLICT (board, period, node) DO UPDATE SET count = {table}.count + excluded.count',
+            rows,
+        )
+
+
+def rank(board, period, score):
+    """1-based position of ``score`` on the board (ties share a rank), or None for no score."""
+    if score <= 0:
+        return None
+    prefix = list(_prefix_nodes(min(score, MAX_SCORE)))
+    counts = dict(LeaderboardCount.objects.filter(
+        board=board, period=period, node__in=prefix + [TREE_SIZE]).values_list('node', 'count'))
+    at_or_below = sum(counts.get(node, 0) for node in prefix)
+    return 1 + counts.get(TREE_SIZE, 0) - at_or_below
+
+
+def size(board, period):
+    """Number of entries on the board, read from the tree's root."""
+    return LeaderboardCount.objects.filter(board=board, period=period, node=TREE_SIZE).values_list(
+        'count', flat=True).first() or 0
+
+
+def entry_deleted(sender, instance, **kwargs):
+    """post_delete handler, so cascades (e.g. deleting a user) keep the trees right."""
+    _move(instance.board, instance.period, instance.score, 0)
+
+
+# Scores
+
+def _set(board, period, user_id, score=None, delta=0):
+    """Set or add to a user's score; the entry is removed when it reaches zero."""
+    with transaction.atomic():
+        entry = LeaderboardEntry.objects.select_for_update().filter(
+            board=board, period=period, user_id=user_id).first()
+        old = entry.score if entry else 0
+        new = min(max(old + delta if score is None else score, 0), MAX_SCORE)
+        if new == old:
+            return
+        if entry is None:
+            try:
+                with transaction.atomic():
+                    LeaderboardEntry.objects.create(board=board, period=period, user_id=user_id, score=new)
+            except IntegrityError:
+                # A concurrent write for the same user created it first
+                return _set(board, period, user_id, score, delta)
+        elif new == 0:
+            entry.delete()
+            return
+        else:
+            LeaderboardEntry.objects.filter(pk=entry.pk).update(score=new)
+        _move(board, period, old, new)
+
+
+def is_public(user_id):
+    return UserProfile.objects.filter(user_id=user_id, is_public=True).exists()
+
+
+def record_pages(user_id, day, pages):
+    """Add ``pages`` read on ``day`` to the page boards (called from the daily rollup)."""
+    today = timezone.localdate()
+    boards = [(board, period_start(board, day)) for board in PAGE_BOARDS]
+    boards = [(board, start) for board, start in boards if start in tracked_periods(board, today)]
+    if not pages or not boards or not is_public(user_id):
+        return
+    for board, start in boards:
+        _set(board, start, user_id, delta=pages)
+
+
+def record_streak(user_id, longest_streak):
+    if is_public(user_id):
+        _set(STREAK_BOARD, EPOCH, user_id, score=longest_streak)
+
+
+def add_user(user_id):
+    """Put a profile that just became public on every board."""
+    for board in PAGE_BOARDS:
+        for start in tracked_periods(board):
+            pages = DailyReadingStat.objects.filter(
+                user_id=user_id, date__gte=start, date__lt=period_end(board, start),
+            ).aggregate(pages=Sum('pages'))['pages'] or 0
+            _set(board, start, user_id, score=pages)
+    streak = ReadingStreak.objects.filter(user_id=user_id).values_list('longest_streak', flat=True).first() or 0
+    _set(STREAK_BOARD, EPOCH, user_id, score=streak)
+
+
+def remove_user(user_id):
+    """Take a profile that is no longer public off every board."""
+    for entry in LeaderboardEntry.objects.filter(user_id=user_id):
+        # One by one so entry_deleted sees each score
+        entry.delete()
+
+
+def prune(today=None):
+    """Delete page-board periods older than the previous one; returns the entries deleted."""
+    deleted = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for board in PAGE_BOARDS:
+            oldest = tracked_periods(board, today)[-1]
+            # Plain DELETEs: the period's tree goes too, so entry_deleted has nothing to do
+            cursor.execute(f'DELETE FROM {LeaderboardEntry._meta.db_table} WHERE board = %s AND period < %s',
+                           [board, oldest])
+            deleted += cursor.rowcount
+            cursor.execute(f'DELETE FROM {LeaderboardCount._meta.db_table} WHERE board = %s AND period < %s',
+                           [board, oldest])
+    return deleted
+
+
+def rebuild():
+    """Recompute every board from scratch; returns the number of public profiles."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Plain DELETEs: the trees are emptied too, so entry_deleted has nothing to do
+        cursor.execute(f'DELETE FROM {LeaderboardEntry._meta.db_table}')
+        cursor.execute(f'DELETE FROM {LeaderboardCount._meta.db_table}')
+        user_ids = list(UserProfile.objects.filter(is_public=True).values_list('user_id', flat=True))
+        for user_id in user_ids:
+            add_user(user_id)
+    return len(user_ids)
+
+
+# Reading
+
+def top(board, period, offset=0, limit=50):
+    """Entries ``offset`` to ``offset + limit``, best first, each with ``rank`` set."""
+    entries = list(LeaderboardEntry.objects.filter(board=board, period=period).select_related('user')
+                   .order_by('-score', 'user_id')[offset:offset + limit])
+    position = offset
+    previous = None
+    for entry in entries:
+        position += 1
+        if previous is None:
+            entry.rank = rank(board, period, entry.score)
+        else:
+            entry.rank = previous.rank if entry.score == previous.score else position
+        previous = entry
+    return entries
+
+
+class Standings:
+    """A board as a sequence ``Paginator`` can count (from the tree) and slice."""
+
+    def __init__(self, board, period):
+        self.board = board
+        self.period = period
+
+    def count(self):
+        return size(self.board, self.period)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        return top(self.board, self.period, key.start or 0, (key.stop or 0) - (key.start or 0))
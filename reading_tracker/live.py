@@ -0,0 +1,175 @@
+"""Live dashboard updates over Server-Sent Events.
+
+Every write to a user's books, sessions or goals bumps their data version
+(``cache.invalidate_user``), which also publishes a change notice here
+once the transaction commits. Each open dashboard holds an SSE stream
+subscribed to its user; on a notice it rebuilds the (cached) dashboard
+snapshot and sends only the values that changed.
+
+Streams are only served under ASGI (e.g. uvicorn). A WSGI server such as
+``runserver`` would buffer the whole stream, so there the dashboard
+leaves live updates out and the events view answers 204.
+
+Fan-out is in-process: a stream hears about writes made by the same
+server process. That covers a single uvicorn worker; with several
+workers, a tab hears about writes handled by its own worker, and picks
+up the rest on its next reconnect, since each stream starts with a full
+snapshot. A shared broker (e.g. Redis
+pub/sub) could replace ``Broker`` without touching the streams.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import transaction
+
+# Seconds between keepalive comments, which stop proxies closing idle streams
+KEEPALIVE = 20
+# Streams are closed after this many seconds; EventSource reconnects by itself
+MAX_AGE = 60 * 30
+# Reconnect delay sent to EventSource, in milliseconds
+RETRY = 3000
+
+
+class Subscription:
+    """One stream's change notices; notices that arrive while it is busy coalesce."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        # Writes usually happen on a worker thread, not the stream's loop
+        try:
+            self.loop.call_soon_threadsafe(self.changed.set)
+        except RuntimeError:
+            pass  # the loop has shut down
+
+    async def wait(self, timeout):
+        """True once a change is published, False after ``timeout`` seconds without one."""
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.changed.clear()
+        return True
+
+
+class Broker:
+    """In-process fan-out of change notices to each user's subscriptions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    @contextmanager
+    def subscribe(self, user_id):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                self._subscriptions[user_id].discard(subscription)
+                if not self._subscriptions[user_id]:
+                    del self._subscriptions[user_id]
+
+    def publish(self, user_id):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.notify()
+
+    def listeners(self, user_id):
+        with self._lock:
+            return len(self._subscriptions.get(user_id, ()))
+
+
+broker = Broker()
+
+
+def publish(user_id):
+    """Tell the user's open dashboards to refresh, once the current transaction commits."""
+    transaction.on_commit(lambda: broker.publish(user_id))
+
+
+# Payloads
+
+def snapshot(context):
+    """The live parts of a dashboard context as plain JSON values."""
+    book = context.get('current_book')
+    streak = context.get('streak')
+    goal = context.get('active_goal')
+    return {
+        'total_books': context['total_books'],
+        'books_completed': context['books_completed'],
+        'total_pages': context['total_pages'],
+        'current_book': {
+            'id': book.pk,
+            'title': book.title,
+            'author': book.author,
+            'progress': round(book.progress, 1),
+        } if book else None,
+        'streak': {
+            'current': streak.current_streak,
+            'longest': streak.longest_streak,
+            'last_active': streak.last_active_date.isoformat(),
+        } if streak and streak.last_active_date else None,
+        'goal': {
+            'id': goal.pk,
+            'pages_read': goal.pages_read,
+            'target_pages': goal.target_pages,
+            'books_completed': goal.books_completed,
+            'target_books': goal.target_books,
+            'progress': goal.progress_percent,
+            'books_progress': goal.books_progress_percent,
+            'days_remaining': goal.days_remaining,
+            'pages_needed_per_day': goal.pages_needed_per_day,
+            'books_remaining': goal.books_remaining,
+        } if goal else None,
+        'charts': context.get('chart_data'),
+    }
+
+
+def delta(previous, current):
+    """Top-level keys of ``current`` whose values differ from ``previous``."""
+    return {key: value for key, value in current.items() if key not in previous or previous[key] != value}
+
+
+def event(data, name='dashboard', event_id=None):
+    """One SSE message."""
+    lines = [f'event: {name}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def stream(user_id, load_snapshot, version):
+    """SSE messages for one dashboard: a full snapshot, then deltas as writes happen.
+
+    ``load_snapshot`` is a coroutine function returning the user's current
+    snapshot; ``version`` one returning their data version, used as the
+    event id.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MAX_AGE
+    with broker.subscribe(user_id) as subscription:
+        yield f'retry: {RETRY}\n\n'
+        sent = {}
+        while True:
+            current = await load_snapshot()
+            changes = delta(sent, current)
+            if changes:
+                yield event(changes, event_id=await version())
+                sent = current
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                if await subscription.wait(min(KEEPALIVE, remaining)):
+                    break
+                yield ': keepalive\n\n'
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reading_tracker.models import DailyReadingStat, ReadingSession, ReadingStreak
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user daily reading rollups and streaks from reading sessions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild rollups for this username.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        sessions = ReadingSession.objects.all()
+        stats = DailyReadingStat.objects.all()
+        if options['user']:
+            sessions = sessions.filter(user__username=options['user'])
+            stats = stats.filter(user__username=options['user'])
+
+        rows = (
+            DailyReadingStat(
+                user_id=row['user_id'],
+                date=row['start_time__date'],
+                pages=row['pages'] or 0,
+                seconds_read=int(row['duration'].total_seconds()) if row['duration'] else 0,
+                session_count=row['session_count'],
+            )
+            for row in DailyReadingStat.daily_totals(sessions).iterator()
+        )
+
+        created = 0
+        with transaction.atomic():
+            stats.delete()
+            batch = []
+            for stat in rows:
+                batch.append(stat)
+                if len(batch) >= options['batch_size']:
+                    created += len(DailyReadingStat.objects.bulk_create(batch))
+                    batch = []
+            if batch:
+                created += len(DailyReadingStat.objects.bulk_create(batch))
+
+            # Streaks are derived from the rollups, so rebuild them alongside
+            user_ids = sessions.order_by().values_list('user_id', flat=True).distinct()
+            streaks = ReadingStreak.objects.all()
+            if options['user']:
+                streaks = streaks.filter(user__username=options['user'])
+            streaks.exclude(user_id__in=user_ids).delete()
+            for user_id in user_ids:
+                ReadingStreak.refresh(user_id)
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {created} daily reading stat row(s).'))
@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from reading_tracker import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Request every reading_tracker view as one user and report p50/p95/p99 latency and query counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to benchmark as (default: the user with the most sessions).')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--view', action='append', dest='views', help='Only benchmark this URL name (repeatable).')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.annotate(n=Count('readingsession')).order_by('-n').first()
+        if user is None:
+            raise CommandError('No such user; create some with generate_synthetic_data.')
+
+        # The test client needs 'testserver' in ALLOWED_HOSTS
+        setup_test_environment()
+        try:
+            results = benchmark.run(user, options['iterations'], options['views'])
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f'{user.username}: {options["iterations"]} request(s) per view, times in ms')
+        self.stdout.write(f'{"view":<28} {"status":>6} {"p50":>8} {"p95":>8} {"p99":>8} {"queries":>8}')
+        for timing in sorted(results, key=lambda t: t.p95, reverse=True):
+            line = (f'{timing.name:<28} {timing.status:>6} {timing.p50:>8.1f} '
+                    f'{timing.p95:>8.1f} {timing.p99:>8.1f} {timing.queries:>8}')
+            self.stdout.write(self.style.ERROR(line) if timing.status >= 500 else line)
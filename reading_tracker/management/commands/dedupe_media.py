@@ -0,0 +1,90 @@
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reading_tracker import images
+from reading_tracker.models import Book, StoredFile, UserProfile
+from reading_tracker.storage import is_hashed_name
+
+FIELDS = (
+    (Book, 'cover_image', images.COVER_SIZES),
+    (UserProfile, 'profile_picture', images.AVATAR_SIZES),
+)
+
+
+class Command(BaseCommand):
+    help = ('Move uploads to content-hashed names so duplicates share one file, '
+            'then recount references and remove files nothing points at.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete-originals', action='store_true',
+                            help='Delete the old uniquely-named files once nothing references them.')
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        if not getattr(storage, 'content_addressed', False):
+            self.stderr.write('The default storage is not content-addressed; nothing to do.')
+            return
+
+        moved = 0
+        legacy = set()
+        for model, field_name, sizes in FIELDS:
+            rows = model.objects.exclude(**{field_name: ''}).values_list('pk', field_name)
+            for pk, name in rows.iterator():
+                if is_hashed_name(name):
+                    continue
+                if not storage.exists(name):
+                    self.stderr.write(f'Missing file for {model.__name__} {pk}: {name}')
+                    continue
+                with storage.open(name, 'rb') as source:
+                    hashed = storage.save(name, source)
+                model.objects.filter(pk=pk).update(**{field_name: hashed})
+                images.generate_derivatives(getattr(model(**{field_name: hashed}), field_name), sizes, force=False)
+                legacy.add(name)
+                moved += 1
+
+        released = self.recount(storage)
+
+        deleted = 0
+        if options['delete_originals']:
+            for name in legacy:
+                if storage.exists(name):
+                    storage.delete(name)
+                images.delete_derivatives(name, images.ALL_SIZES, storage)
+                deleted += 1
+
+        stored = StoredFile.objects.count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {moved} upload(s) into {stored} stored file(s); '
+            f'released {released} unreferenced, deleted {deleted} original(s).'
+        ))
+
+    def recount(self, storage):
+        """Reset reference counts from the rows that actually point at each file."""
+        counts = Counter()
+        for model, field_name, _ in FIELDS:
+            counts.update(
+                name for name in model.objects.exclude(**{field_name: ''}).values_list(field_name, flat=True).iterator()
+                if is_hashed_name(name)
+            )
+
+        released = 0
+        with transaction.atomic():
+            for stored in StoredFile.objects.select_for_update():
+                references = counts.pop(stored.name, 0)
+                if references:
+                    if stored.references != references:
+                        StoredFile.objects.filter(pk=stored.pk).update(references=references)
+                    continue
+                stored.delete()
+                if storage.exists(stored.name):
+                    storage.delete(stored.name)
+                images.delete_derivatives(stored.name, images.ALL_SIZES, storage)
+                released += 1
+            StoredFile.objects.bulk_create(
+                StoredFile(name=name, size=storage.size(name) if storage.exists(name) else 0, references=references)
+                for name, references in counts.items()
+            )
+        return released
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from reading_tracker.models import Book, DailyReadingStat, ReadingGoal, ReadingSession, day_start
+
+
+def view_queries(user):
+    """The hot queries behind each view, as (view, description, queryset)."""
+    today = timezone.localdate()
+    month_ago = today - timedelta(days=30)
+    # Date ranges as start_time ranges, the way the views filter them
+    since, until = day_start(month_ago), day_start(today + timedelta(days=1))
+    sessions = ReadingSession.objects.filter(user=user)
+    books = Book.objects.filter(user=user)
+    return [
+        ('dashboard', 'currently reading book', books.filter(status='CR')[:1]),
+        ('dashboard', 'active goal', ReadingGoal.objects.filter(
+            user=user, start_date__lte=today, end_date__gte=today).order_by('-created_at')[:1]),
+        ('book_list', 'books by status', books.filter(status='CO')),
+        ('genre_distribution', 'books per genre', books.values('genre').annotate(count=Count('id')).order_by()),
+        ('genre_filter', 'books in one genre', books.filter(genre='FIC_LIT')),
+        ('book_status_data', 'books per status', books.values('status').annotate(count=Count('id')).order_by()),
+        ('goals', 'completed books in goal period', books.filter(
+            status='CO',
+            readingsession__start_time__gte=since,
+            readingsession__start_time__lt=until,
+        ).values('id').distinct()),
+        ('goals', 'pages in goal period', DailyReadingStat.objects.filter(
+            user=user, date__range=(month_ago, today)).values('user').annotate(pages=Sum('pages')).order_by()),
+        ('analytics_dashboard', 'sessions in window', sessions.filter(
+            start_time__gte=timezone.now() - timedelta(days=30)).order_by()),
+        ('api:sessions', 'sessions by start date', sessions.filter(
+            start_time__gte=since, start_time__lt=until)),
+        ('reading_progress_data', 'daily pages', DailyReadingStat.objects.filter(
+            user=user, date__gte=month_ago).order_by('date')),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Print the query plan (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on PostgreSQL) for each view\'s main queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to build the queries for (defaults to the first user).')
+        parser.add_argument('--analyze', action='store_true', help='On PostgreSQL, run EXPLAIN ANALYZE.')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(username=options['user'])
+        user = users.first()
+        if user is None:
+            raise CommandError('No matching user.')
+
+        if connection.vendor == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN '
+        elif options['analyze']:
+            prefix = 'EXPLAIN (ANALYZE, BUFFERS) '
+        else:
+            prefix = 'EXPLAIN '
+
+        self.stdout.write(f'Query plans on {connection.vendor} for user {user.username}\n')
+        for view, description, queryset in view_queries(user):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{view}: {description}'))
+            for line in self.explain(prefix, queryset):
+                self.stdout.write(f'  {line}')
+            self.stdout.write('')
+
+    def explain(self, prefix, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            # SQLite puts the plan step in the last column, PostgreSQL returns one text column
+            return [row[-1] for row in cursor.fetchall()]
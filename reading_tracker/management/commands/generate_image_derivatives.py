@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from reading_tracker import images
+from reading_tracker.models import Book, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and medium WebP/JPEG derivatives for existing cover and profile images.'
+
+    def handle(self, *args, **options):
+        written = failed = 0
+        targets = (
+            (Book.objects.exclude(cover_image=''), 'cover_image', images.COVER_SIZES),
+            (UserProfile.objects.exclude(profile_picture=''), 'profile_picture', images.AVATAR_SIZES),
+        )
+        for queryset, field_name, sizes in targets:
+            for instance in queryset.only('pk', field_name).iterator():
+                if images.generate_derivatives(getattr(instance, field_name), sizes):
+                    written += 1
+                else:
+                    failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Generated derivatives for {written} image(s), skipped {failed}.'))
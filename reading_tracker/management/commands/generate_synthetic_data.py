@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reading_tracker.synthetic import generate
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, books, reading sessions and goals for profiling.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--books', type=int, default=50, help='Books per user.')
+        parser.add_argument('--years', type=int, default=3, help='How far back reading history goes.')
+        parser.add_argument('--prefix', default='reader', help='Username prefix, e.g. reader0, reader1, ...')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--seed', type=int, help='Random seed for reproducible data.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        result = generate(
+            users=options['users'],
+            books=options['books'],
+            years=options['years'],
+            prefix=options['prefix'],
+            password=options['password'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {result.users} user(s), {result.books} book(s), {result.sessions} session(s) '
+            f'and {result.goals} goal(s) in {time.perf_counter() - start:.1f}s.'
+        ))
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from reading_tracker.importers import import_library
+
+
+class Command(BaseCommand):
+    help = "Import a Goodreads or StoryGraph CSV export into a user's library."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path', help='Path to the exported CSV file.')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--default-pages', type=int, default=300,
+                            help='Page count to use when the export has none.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+
+        def report(result):
+            self.stdout.write(f'{result.rows} rows read, {result.books} books and {result.sessions} sessions written')
+
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as export:
+                result = import_library(user, export, chunk_size=options['chunk_size'],
+                                        default_pages=options['default_pages'], progress=report)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.books} book(s) and {result.sessions} session(s); skipped {result.skipped} row(s).'))
@@ -0,0 +1,39 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reading_tracker import catalog
+from reading_tracker.models import CatalogEntry
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load the offline ISBN catalog from a CSV or Open Library editions dump (optionally gzipped).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=sorted(catalog.PARSERS), default='csv')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--replace', action='store_true', help='Delete the existing catalog first.')
+
+    def handle(self, *args, **options):
+        if options['replace']:
+            deleted, _ = CatalogEntry.objects.all().delete()
+            self.stdout.write(f'Deleted {deleted} catalog entries.')
+
+        start = time.perf_counter()
+
+        def report(written):
+            self.stdout.write(f'{written} entries written ({time.perf_counter() - start:.0f}s)')
+
+        path = options['path']
+        opener = gzip.open if path.endswith('.gz') else open
+        parse = catalog.PARSERS[options['format']]
+        try:
+            with opener(path, 'rt', newline='', encoding='utf-8-sig', errors='replace') as dump:
+                written = catalog.load(parse(dump), batch_size=options['batch_size'], progress=report)
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {written} catalog entries in {time.perf_counter() - start:.1f}s.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reading_tracker.leaderboards import prune
+
+
+class Command(BaseCommand):
+    help = 'Delete leaderboard periods older than the previous week, month and year (run daily, e.g. from cron).'
+
+    def handle(self, *args, **options):
+        deleted = prune()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} leaderboard entr{"y" if deleted == 1 else "ies"}.'))
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reading_tracker.leaderboards import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute every leaderboard from the daily rollups and streaks of public profiles.'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        profiles = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt leaderboards for {profiles} public profile(s) in {time.perf_counter() - start:.1f}s.'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from reading_tracker.models import Book, ReadingSession
+
+
+class Command(BaseCommand):
+    help = "Rebuild every book's stored pages-read total and progress from its reading sessions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild books belonging to this username.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        books = Book.objects.all()
+        sessions = ReadingSession.objects.all()
+        if options['user']:
+            books = books.filter(user__username=options['user'])
+            sessions = sessions.filter(user__username=options['user'])
+
+        # One grouped aggregate for all books instead of one SUM per book
+        totals = dict(
+            sessions.order_by().values('book').annotate(total=Sum('pages_read')).values_list('book', 'total')
+        )
+
+        changed = []
+        for book in books.only('id', 'total_pages', 'pages_read', 'progress').iterator():
+            pages_read = totals.get(book.id) or 0
+            progress = min((pages_read / book.total_pages) * 100, 100) if book.total_pages > 0 else 0
+            if book.pages_read != pages_read or book.progress != progress:
+                book.pages_read = pages_read
+                book.progress = progress
+                changed.append(book)
+
+        with transaction.atomic():
+            Book.objects.bulk_update(changed, ['pages_read', 'progress'], batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt reading progress for {len(changed)} book(s).'))
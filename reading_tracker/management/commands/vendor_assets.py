@@ -0,0 +1,41 @@
+import re
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reading_tracker.assets import VENDOR_ASSETS
+
+# The minified bundles point at .map files we don't ship; the manifest
+# storage would fail collectstatic trying to fingerprint them
+SOURCE_MAP = re.compile(rb'\n?(/\*# sourceMappingURL=[^*]*\*/|//# sourceMappingURL=\S*)\s*$')
+
+
+class Command(BaseCommand):
+    help = 'Download the pinned third-party CSS/JS/font assets into static/vendor.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Download files that already exist.')
+
+    def handle(self, *args, **options):
+        root = Path(settings.STATICFILES_DIRS[0])
+        written = 0
+        for name, (path, url, extra) in VENDOR_ASSETS.items():
+            for target, source in ((path, url), *extra):
+                destination = root / target
+                if destination.exists() and not options['force']:
+                    continue
+                try:
+                    with urlopen(source, timeout=30) as response:
+                        content = response.read()
+                except OSError as exc:
+                    raise CommandError(f'Could not download {source}: {exc}')
+                if target.endswith(('.css', '.js')):
+                    content = SOURCE_MAP.sub(b'\n', content)
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                destination.write_bytes(content)
+                written += 1
+                self.stdout.write(f'{name}: {target} ({len(content)} bytes)')
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} file(s) to {root / "vendor"}. Run collectstatic to fingerprint them.'))
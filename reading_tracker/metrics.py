@@ -0,0 +1,80 @@
+"""In-process request metrics with Prometheus text exposition.
+
+Histograms are kept per process and per view name. They reset when the
+process restarts, which is what Prometheus expects from counters.
+"""
+import threading
+from collections import defaultdict
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """A labelled cumulative histogram, safe to observe from several threads."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = defaultdict(lambda: [[0] * len(self.buckets), 0, 0.0])
+
+    def observe(self, label, value):
+        with self._lock:
+            counts, _, _ = series = self._series[label]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {label: (list(counts), count, total) for label, (counts, count, total) in self._series.items()}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label, (counts, count, total) in sorted(self.snapshot().items()):
+            view = _escape(label)
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{view="{view}",le="{_format(bound)}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{view="{view}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{view="{view}"}} {_format(total)}')
+            lines.append(f'{self.name}_count{{view="{view}"}} {count}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+request_duration = Histogram(
+    'reading_tracker_request_duration_seconds', 'Wall time spent handling a request.', DURATION_BUCKETS)
+db_queries = Histogram(
+    'reading_tracker_db_queries', 'SQL queries executed per request.', QUERY_BUCKETS)
+db_duration = Histogram(
+    'reading_tracker_db_duration_seconds', 'Time spent in SQL per request.', DURATION_BUCKETS)
+response_size = Histogram(
+    'reading_tracker_response_size_bytes', 'Response body size.', SIZE_BUCKETS)
+
+HISTOGRAMS = (request_duration, db_queries, db_duration, response_size)
+
+
+def observe_request(view, seconds, queries, sql_seconds, size):
+    request_duration.observe(view, seconds)
+    db_queries.observe(view, queries)
+    db_duration.observe(view, sql_seconds)
+    response_size.observe(view, size)
+
+
+def render_prometheus():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return '\n'.join(lines) + '\n'
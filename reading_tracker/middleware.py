@@ -0,0 +1,89 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger('reading_tracker.requests')
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class RequestMetricsMiddleware:
+    """Record wall time, SQL queries, SQL time and response size for every view.
+
+    Works in both sync and async stacks, so async views under ASGI are not
+    pushed back onto a thread by this middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with self.counting(counter):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, counter)
+        return response
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        # Connections are per thread, and the async ORM runs its queries in
+        # the request's thread-sensitive worker, so install the wrappers there
+        stack = await sync_to_async(self.counting)(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.record(request, response, time.perf_counter() - start, counter)
+        return response
+
+    @staticmethod
+    def counting(counter):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        return stack
+
+    def record(self, request, response, elapsed, counter):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        size = len(response.content) if not response.streaming else 0
+
+        metrics.observe_request(view, elapsed, counter.count, counter.seconds, size)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'view': view,
+                'method': request.method,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 2),
+                'queries': counter.count,
+                'sql_ms': round(counter.seconds * 1000, 2),
+                'bytes': size,
+            }))
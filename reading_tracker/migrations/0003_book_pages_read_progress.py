@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-18 06:03
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_pages_read(apps, schema_editor):
+    Book = apps.get_model('reading_tracker', 'Book')
+    ReadingSession = apps.get_model('reading_tracker', 'ReadingSession')
+    totals = dict(
+        ReadingSession.objects.order_by().values('book').annotate(total=Sum('pages_read')).values_list('book', 'total')
+    )
+    books = list(Book.objects.filter(pk__in=totals.keys()))
+    for book in books:
+        book.pages_read = totals[book.pk] or 0
+        book.progress = min((book.pages_read / book.total_pages) * 100, 100) if book.total_pages > 0 else 0
+    Book.objects.bulk_update(books, ['pages_read', 'progress'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading_tracker', '0002_alter_book_genre'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='pages_read',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='progress',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(populate_pages_read, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='book',
+            name='genre',
+            field=models.CharField(choices=[('FIC_LIT', 'Literary Fiction'), ('FIC_MYS', 'Mystery'), ('FIC_THR', 'Thriller'), ('FIC_SFF', 'Science Fiction/Fantasy'), ('FIC_ROM', 'Romance'), ('FIC_HIS', 'Historical Fiction'), ('NON_BIO', 'Biography/Memoir'), ('NON_HIS', 'History'), ('NON_SCI', 'Science'), ('NON_TECH', 'Technology'), ('NON_SELF', 'Self-Help'), ('NON_BUS', 'Business'), ('NON_PHIL', 'Philosophy'), ('OTH_POET', 'Poetry'), ('OTH_DRAMA', 'Drama'), ('OTH_COMIC', 'Comics/Graphic Novels'), ('OTH_CHILD', "Children's"), ('OTH_YA', 'Young Adult'), ('OTH_OTHER', 'Other')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.1 on 2026-10-18 06:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def populate_daily_stats(apps, schema_editor):
+    DailyReadingStat = apps.get_model('reading_tracker', 'DailyReadingStat')
+    ReadingSession = apps.get_model('reading_tracker', 'ReadingSession')
+    totals = ReadingSession.objects.order_by().values('user_id', 'start_time__date').annotate(
+        pages=Sum('pages_read'),
+        duration=Sum(F('end_time') - F('start_time')),
+        session_count=Count('id'),
+    )
+    DailyReadingStat.objects.bulk_create([
+        DailyReadingStat(
+            user_id=row['user_id'],
+            date=row['start_time__date'],
+            pages=row['pages'] or 0,
+            seconds_read=int(row['duration'].total_seconds()) if row['duration'] else 0,
+            session_count=row['session_count'],
+        )
+        for row in totals
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading_tracker', '0003_book_pages_read_progress'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReadingStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('pages', models.IntegerField(default=0)),
+                ('seconds_read', models.IntegerField(default=0)),
+                ('session_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyreadingstat',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_daily_reading_stat'),
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-18 06:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from reading_tracker.streaks import compute_streaks
+
+
+def populate_streaks(apps, schema_editor):
+    DailyReadingStat = apps.get_model('reading_tracker', 'DailyReadingStat')
+    ReadingStreak = apps.get_model('reading_tracker', 'ReadingStreak')
+    user_ids = DailyReadingStat.objects.order_by().values_list('user_id', flat=True).distinct()
+    streaks = []
+    for user_id in user_ids:
+        dates = DailyReadingStat.objects.filter(user_id=user_id, session_count__gt=0).order_by('date').values_list('date', flat=True)
+        last_run, longest, last_active = compute_streaks(dates)
+        streaks.append(ReadingStreak(user_id=user_id, last_run=last_run, longest_streak=longest, last_active_date=last_active))
+    ReadingStreak.objects.bulk_create(streaks, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading_tracker', '0004_dailyreadingstat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingStreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_run', models.IntegerField(default=0)),
+                ('longest_streak', models.IntegerField(default=0)),
+                ('last_active_date', models.DateField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(populate_streaks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-18 06:19
+
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading_tracker', '0006_storedfile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['user', 'status'], name='book_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['user', 'genre'], name='book_user_genre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readinggoal',
+            index=models.Index(fields=['user', 'start_date', 'end_date'], name='goal_user_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingsession',
+            index=models.Index(fields=['user', 'start_time'], name='session_user_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingsession',
+            index=models.Index(models.F('user'), django.db.models.functions.datetime.TruncDate('start_time'), name='session_user_start_date_idx'),
+        ),
+    ]
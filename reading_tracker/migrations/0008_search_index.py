@@ -0,0 +1,89 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:12
+
+from django.db import migrations
+
+# The schema as it was when this migration was written; reading_tracker.search
+# describes the current one, so it isn't imported here.
+SQLITE_FORWARDS = [
+    "CREATE VIRTUAL TABLE reading_tracker_book_fts USING fts5(title, author, isbn, content='reading_tracker_book', "
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER reading_tracker_book_fts_ai AFTER INSERT ON reading_tracker_book BEGIN "
+    "INSERT INTO reading_tracker_book_fts(rowid, title, author, isbn) VALUES (new.id, new.title, new.author, new.isbn); "
+    "END",
+    "CREATE TRIGGER reading_tracker_book_fts_ad AFTER DELETE ON reading_tracker_book BEGIN "
+    "INSERT INTO reading_tracker_book_fts(reading_tracker_book_fts, rowid, title, author, isbn) "
+    "VALUES ('delete', old.id, old.title, old.author, old.isbn); "
+    "END",
+    "CREATE TRIGGER reading_tracker_book_fts_au AFTER UPDATE OF title, author, isbn ON reading_tracker_book BEGIN "
+    "INSERT INTO reading_tracker_book_fts(reading_tracker_book_fts, rowid, title, author, isbn) "
+    "VALUES ('delete', old.id, old.title, old.author, old.isbn); "
+    "INSERT INTO reading_tracker_book_fts(rowid, title, author, isbn) VALUES (new.id, new.title, new.author, new.isbn); "
+    "END",
+    "INSERT INTO reading_tracker_book_fts(reading_tracker_book_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE reading_tracker_readingsession_fts USING fts5(notes, "
+    "content='reading_tracker_readingsession', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER reading_tracker_readingsession_fts_ai AFTER INSERT ON reading_tracker_readingsession BEGIN "
+    "INSERT INTO reading_tracker_readingsession_fts(rowid, notes) VALUES (new.id, new.notes); "
+    "END",
+    "CREATE TRIGGER reading_tracker_readingsession_fts_ad AFTER DELETE ON reading_tracker_readingsession BEGIN "
+    "INSERT INTO reading_tracker_readingsession_fts(reading_tracker_readingsession_fts, rowid, notes) "
+    "VALUES ('delete', old.id, old.notes); "
+    "END",
+    "CREATE TRIGGER reading_tracker_readingsession_fts_au AFTER UPDATE OF notes ON reading_tracker_readingsession BEGIN "
+    "INSERT INTO reading_tracker_readingsession_fts(reading_tracker_readingsession_fts, rowid, notes) "
+    "VALUES ('delete', old.id, old.notes); "
+    "INSERT INTO reading_tracker_readingsession_fts(rowid, notes) VALUES (new.id, new.notes); "
+    "END",
+    "INSERT INTO reading_tracker_readingsession_fts(reading_tracker_readingsession_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARDS = [
+    'DROP TRIGGER IF EXISTS reading_tracker_book_fts_ai',
+    'DROP TRIGGER IF EXISTS reading_tracker_book_fts_ad',
+    'DROP TRIGGER IF EXISTS reading_tracker_book_fts_au',
+    'DROP TABLE IF EXISTS reading_tracker_book_fts',
+    'DROP TRIGGER IF EXISTS reading_tracker_readingsession_fts_ai',
+    'DROP TRIGGER IF EXISTS reading_tracker_readingsession_fts_ad',
+    'DROP TRIGGER IF EXISTS reading_tracker_readingsession_fts_au',
+    'DROP TABLE IF EXISTS reading_tracker_readingsession_fts',
+]
+
+POSTGRES_FORWARDS = [
+    "ALTER TABLE reading_tracker_book ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(isbn, '')), 'A')) STORED",
+    'CREATE INDEX reading_tracker_book_search_idx ON reading_tracker_book USING GIN (search_vector)',
+    "ALTER TABLE reading_tracker_readingsession ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english'::regconfig, coalesce(notes, '')), 'A')) STORED",
+    'CREATE INDEX reading_tracker_readingsession_search_idx ON reading_tracker_readingsession USING GIN (search_vector)',
+]
+
+POSTGRES_BACKWARDS = [
+    'DROP INDEX IF EXISTS reading_tracker_book_search_idx',
+    'ALTER TABLE reading_tracker_book DROP COLUMN IF EXISTS search_vector',
+    'DROP INDEX IF EXISTS reading_tracker_readingsession_search_idx',
+    'ALTER TABLE reading_tracker_readingsession DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        # Other backends have no index; search falls back to icontains there
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading_tracker', '0007_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARDS, 'postgresql': POSTGRES_FORWARDS}),
+            run({'sqlite': SQLITE_BACKWARDS, 'postgresql': POSTGRES_BACKWARDS}),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading_tracker', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('isbn13', models.CharField(max_length=13, unique=True)),
+                ('isbn10', models.CharField(blank=True, db_index=True, max_length=10)),
+                ('title', models.CharField(max_length=200)),
+                ('author', models.CharField(blank=True, max_length=200)),
+                ('total_pages', models.IntegerField(blank=True, null=True)),
+                ('genre', models.CharField(blank=True, max_length=20)),
+                ('title_key', models.CharField(db_index=True, max_length=200)),
+                ('author_key', models.CharField(db_index=True, max_length=200)),
+            ],
+            options={
+                'verbose_name_plural': 'catalog entries',
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.0.1 on 2026-10-18 06:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading_tracker', '0009_catalogentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=10)),
+                ('period', models.DateField()),
+                ('node', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('week', 'Pages this week'), ('month', 'Pages this month'), ('year', 'Pages this year'), ('streak', 'Longest streak')], max_length=10)),
+                ('period', models.DateField()),
+                ('score', models.IntegerField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardcount',
+            constraint=models.UniqueConstraint(fields=('board', 'period', 'node'), name='unique_leaderboard_count'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(models.F('board'), models.F('period'), models.OrderBy(models.F('score'), descending=True), models.F('user'), name='leaderboard_top_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'period', 'user'), name='unique_leaderboard_entry'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-18 07:13
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reading_tracker', '0010_leaderboards'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='readingsession',
+            name='session_user_start_date_idx',
+        ),
+    ]
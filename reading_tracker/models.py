@@ -1,7 +1,31 @@
-from django.db import models
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Least
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from . import images
+from .cache import invalidate_user
+from .streaks import compute_streaks, current_streak, extend_streak
+
+logger = logging.getLogger(__name__)
+
+
+def day_start(day):
+    """The aware datetime at which ``day`` begins in the current time zone.
+
+    Filter sessions by day with ``start_time__gte=day_start(first)`` and
+    ``start_time__lt=day_start(last + 1 day)`` rather than
+    ``start_time__date``: the plain range can use the (user, start_time)
+    index, the cast date can't.
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     is_public = models.BooleanField(default=False)
@@ -11,6 +35,83 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s profile"
 
+    @property
+    def picture_thumbnail_url(self):
+        return images.derivative_url(self.profile_picture, 'thumb')
+
+    @property
+    def picture_webp_srcset(self):
+        return images.srcset(self.profile_picture, images.AVATAR_SIZES, 'webp')
+
+    @property
+    def picture_jpeg_srcset(self):
+        return images.srcset(self.profile_picture, images.AVATAR_SIZES, 'jpg')
+
+    def save(self, *args, **kwargs):
+        replaced = _pending_upload(self, 'profile_picture')
+        was_public = self.pk is not None and UserProfile.objects.filter(pk=self.pk, is_public=True).exists()
+        super().save(*args, **kwargs)
+        if replaced is not None:
+            _store_derivatives(self.profile_picture, replaced, images.AVATAR_SIZES)
+        # Only public profiles appear on the leaderboards
+        from . import leaderboards
+        if self.is_public and not was_public:
+            leaderboards.add_user(self.user_id)
+        elif was_public and not self.is_public:
+            leaderboards.remove_user(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from . import leaderboards
+        leaderboards.remove_user(self.user_id)
+        return result
+
+def _pending_upload(instance, field_name):
+    """Return the stored file name an unsaved upload will replace ('' for none), or None if nothing is pending."""
+    fieldfile = getattr(instance, field_name)
+    if not fieldfile or fieldfile._committed:
+        return None
+    if not instance.pk:
+        return ''
+    return type(instance).objects.filter(pk=instance.pk).values_list(field_name, flat=True).first() or ''
+
+def _store_derivatives(fieldfile, replaced, sizes):
+    storage = fieldfile.storage
+    content_addressed = getattr(storage, 'content_addressed', False)
+    if replaced:
+        if content_addressed:
+            storage.release(replaced)
+        elif replaced != fieldfile.name:
+            images.delete_derivatives(replaced, sizes, storage)
+    # A content-addressed file that already has derivatives was uploaded before
+    images.generate_derivatives(fieldfile, sizes, force=not content_addressed)
+
+def _release_file(fieldfile):
+    if fieldfile and getattr(fieldfile.storage, 'content_addressed', False):
+        fieldfile.storage.release(fieldfile.name)
+
+def release_uploads(sender, instance, **kwargs):
+    """post_delete handler for models with uploads.
+
+    A signal rather than ``delete()`` so cascades (e.g. deleting a user,
+    which takes their books and profile with it) release their files too.
+    Files are only released once the deletion has committed.
+    """
+    for field in instance._meta.fields:
+        if isinstance(field, models.FileField):
+            fieldfile = getattr(instance, field.attname)
+            transaction.on_commit(lambda fieldfile=fieldfile: _release_file(fieldfile))
+
+class StoredFile(models.Model):
+    """Reference count for a content-addressed upload shared by books and profiles."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    references = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.references} reference{'s' if self.references != 1 else ''})"
+
 class Book(models.Model):
     READING_STATUS = (
         ('CR', 'Currently Reading'),
@@ -58,6 +159,8 @@ class Book(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     status = models.CharField(max_length=2, choices=READING_STATUS, default='TB')
     cover_image = models.ImageField(upload_to='book_covers', blank=True)
+    pages_read = models.IntegerField(default=0)
+    progress = models.FloatField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -65,13 +168,10 @@ class Book(models.Model):
         return f"{self.title} by {self.author}"
 
     def calculate_reading_progress(self):
-        """Calculate reading progress and update book status."""
-        # Get total pages read from all sessions
-        total_pages_read = ReadingSession.objects.filter(book=self).aggregate(
-            total_pages=models.Sum('pages_read'))['total_pages'] or 0
-        
+        """Calculate reading progress from the stored page total and update book status."""
         # Calculate progress percentage
-        progress = min((total_pages_read / self.total_pages) * 100, 100) if self.total_pages > 0 else 0
+        progress = min((self.pages_read / self.total_pages) * 100, 100) if self.total_pages > 0 else 0
+        self.progress = progress
         
         # Check if this is a new completion
         was_not_completed = self.status != 'CO'
@@ -88,6 +188,49 @@ class Book(models.Model):
         # Return both progress and whether this was a new completion
         return progress, (was_not_completed and self.status == 'CO')
 
+    @staticmethod
+    def pages_read_update(delta):
+        """Build ``update()`` kwargs that add ``delta`` pages and refresh progress and status.
+
+        Everything is computed in one UPDATE statement from the row's current
+        values, so concurrent sessions for the same book never lose pages.
+        The status rules mirror ``calculate_reading_progress``.
+        """
+        pages = F('pages_read') + delta
+        return {
+            'pages_read': pages,
+            'progress': Case(
+                When(total_pages__lte=0, then=Value(0.0)),
+                default=Least(pages * 100.0 / F('total_pages'), Value(100.0)),
+                output_field=FloatField(),
+            ),
+            'status': Case(
+                When(status='AB', then=Value('AB')),
+                When(total_pages__lte=0, then=Value('TB')),
+                When(GreaterThanOrEqual(pages, F('total_pages')), then=Value('CO')),
+                When(GreaterThan(pages, 0), then=Value('CR')),
+                default=Value('TB'),
+            ),
+            'updated_at': timezone.now(),
+        }
+
+    @property
+    def cover_thumbnail_url(self):
+        return images.derivative_url(self.cover_image, 'thumb')
+
+    @property
+    def cover_webp_srcset(self):
+        return images.srcset(self.cover_image, images.COVER_SIZES, 'webp')
+
+    @property
+    def cover_jpeg_srcset(self):
+        return images.srcset(self.cover_image, images.COVER_SIZES, 'jpg')
+
+    def add_pages_read(self, delta):
+        """Atomically adjust the stored pages-read total and reload progress and status."""
+        Book.objects.filter(pk=self.pk).update(**Book.pages_read_update(delta))
+        self.refresh_from_db(fields=['pages_read', 'progress', 'status', 'updated_at'])
+
     def get_genre_display_name(self):
         """Get the display name for the book's genre."""
         for category, subcategories in self.GENRE_CHOICES:
@@ -97,16 +240,34 @@ class Book(models.Model):
                         return name
         return self.get_genre_display()
 
+    def delete(self, *args, **kwargs):
+        # Sessions are removed by cascade without calling their delete(), so
+        # take them out of the daily rollups first
+        with transaction.atomic():
+            DailyReadingStat.remove_sessions(self.readingsession_set.all())
+            result = super().delete(*args, **kwargs)
+            ReadingStreak.refresh(self.user_id)
+        invalidate_user(self.user_id)
+        return result
+
     def save(self, *args, **kwargs):
+        replaced = _pending_upload(self, 'cover_image')
         if not self.pk:  # New book
             super().save(*args, **kwargs)
         else:
             # Calculate progress and update status before saving
             self.calculate_reading_progress()
             super().save(*args, **kwargs)
+        if replaced is not None:
+            _store_derivatives(self.cover_image, replaced, images.COVER_SIZES)
+        invalidate_user(self.user_id)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status'], name='book_user_status_idx'),
+            models.Index(fields=['user', 'genre'], name='book_user_genre_idx'),
+        ]
 
 class ReadingSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -117,20 +278,205 @@ class ReadingSession(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    TRACKED_FIELDS = ('user_id', 'book_id', 'pages_read', 'start_time', 'end_time')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what is stored so edits only apply the difference to the rollups
+        instance._stored_values = {name: instance.__dict__.get(name) for name in cls.TRACKED_FIELDS}
+        return instance
+
     def duration(self):
         return self.end_time - self.start_time
 
+    def _stored_snapshot(self):
+        """Return the tracked field values currently stored for this session, if any."""
+        stored = getattr(self, '_stored_values', None)
+        if stored and None not in stored.values():
+            return stored
+        if self.pk is None:
+            return None
+        return ReadingSession.objects.filter(pk=self.pk).values(*self.TRACKED_FIELDS).first()
+
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        # Update book progress after saving the session
-        self.book.calculate_reading_progress()
-        self.book.save()
+        with transaction.atomic():
+            stored = self._stored_snapshot()
+            super().save(*args, **kwargs)
+
+            # Update the book's running page total after saving the session
+            if stored is None:
+                self.book.add_pages_read(self.pages_read)
+            elif stored['book_id'] != self.book_id:
+                Book.objects.filter(pk=stored['book_id']).update(**Book.pages_read_update(-stored['pages_read']))
+                self.book.add_pages_read(self.pages_read)
+            elif stored['pages_read'] != self.pages_read:
+                self.book.add_pages_read(self.pages_read - stored['pages_read'])
+
+            # Move the session's contribution between daily rollup rows
+            current = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+            if stored is None:
+                DailyReadingStat.record_session(current)
+                ReadingStreak.record_day(self.user_id, timezone.localdate(self.start_time))
+            elif any(stored[name] != current[name] for name in ('user_id', 'pages_read', 'start_time', 'end_time')):
+                DailyReadingStat.record_session(stored, sign=-1)
+                DailyReadingStat.record_session(current)
+
+                # Moving a session to another day (or user) can split or join streaks
+                if (stored['user_id'] != self.user_id or
+                        timezone.localdate(stored['start_time']) != timezone.localdate(self.start_time)):
+                    ReadingStreak.refresh(stored['user_id'])
+                    if stored['user_id'] != self.user_id:
+                        ReadingStreak.refresh(self.user_id)
+        self._stored_values = current
+        invalidate_user(self.user_id)
+        if stored is not None and stored['user_id'] != self.user_id:
+            invalidate_user(stored['user_id'])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            stored = self._stored_snapshot()
+            result = super().delete(*args, **kwargs)
+            if stored is not None:
+                Book.objects.filter(pk=stored['book_id']).update(**Book.pages_read_update(-stored['pages_read']))
+                DailyReadingStat.record_session(stored, sign=-1)
+                ReadingStreak.refresh(stored['user_id'])
+                invalidate_user(stored['user_id'])
+        return result
 
     def __str__(self):
         return f"{self.user.username}'s session - {self.book.title} ({self.pages_read} pages)"
 
     class Meta:
         ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['user', 'start_time'], name='session_user_start_idx'),
+        ]
+
+class DailyReadingStat(models.Model):
+    """Per-user, per-day rollup of reading sessions, kept in step with session writes."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    pages = models.IntegerField(default=0)
+    seconds_read = models.IntegerField(default=0)
+    session_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username} on {self.date}: {self.pages} pages"
+
+    @classmethod
+    def record(cls, user_id, date, pages=0, seconds=0, sessions=0):
+        """Atomically add the given deltas to the user's row for ``date``."""
+        deltas = {
+            'pages': F('pages') + pages,
+            'seconds_read': F('seconds_read') + seconds,
+            'session_count': F('session_count') + sessions,
+        }
+        rows = cls.objects.filter(user_id=user_id, date=date)
+        if not rows.update(**deltas):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user_id=user_id, date=date, pages=pages,
+                                       seconds_read=seconds, session_count=sessions)
+            except IntegrityError:
+                # Another writer created the row first
+                rows.update(**deltas)
+        if sessions < 0:
+            rows.filter(session_count__lte=0).delete()
+        if pages:
+            from . import leaderboards
+            leaderboards.record_pages(user_id, date, pages)
+
+    @classmethod
+    def record_session(cls, values, sign=1):
+        """Add (or with ``sign=-1`` remove) one session's contribution to its day."""
+        duration = values['end_time'] - values['start_time']
+        cls.record(
+            values['user_id'],
+            timezone.localdate(values['start_time']),
+            pages=sign * values['pages_read'],
+            seconds=sign * int(duration.total_seconds()),
+            sessions=sign,
+        )
+
+    @staticmethod
+    def daily_totals(sessions):
+        """Group a session queryset into per-user, per-day totals."""
+        return sessions.order_by().values('user_id', 'start_time__date').annotate(
+            pages=models.Sum('pages_read'),
+            duration=models.Sum(F('end_time') - F('start_time')),
+            session_count=models.Count('id'),
+        )
+
+    @classmethod
+    def remove_sessions(cls, sessions):
+        """Subtract a batch of sessions that is about to be deleted in bulk."""
+        for row in cls.daily_totals(sessions):
+            cls.record(
+                row['user_id'],
+                row['start_time__date'],
+                pages=-(row['pages'] or 0),
+                seconds=-int(row['duration'].total_seconds()) if row['duration'] else 0,
+                sessions=-row['session_count'],
+            )
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_daily_reading_stat'),
+        ]
+
+class ReadingStreak(models.Model):
+    """Persisted streak state so pages can show streaks without rescanning history."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    last_run = models.IntegerField(default=0)
+    longest_streak = models.IntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username}'s streak"
+
+    @property
+    def current_streak(self):
+        """Length of the streak still running today (0 once a full day is missed)."""
+        return current_streak(self.last_run, self.last_active_date, timezone.localdate())
+
+    @classmethod
+    def for_user(cls, user):
+        """Return the user's streak, or an unsaved empty one if they have never read."""
+        return cls.objects.filter(user=user).first() or cls(user=user)
+
+    @classmethod
+    def record_day(cls, user_id, day):
+        """Account for a session on ``day``, extending the streak in O(1) when possible."""
+        streak, _ = cls.objects.select_for_update().get_or_create(user_id=user_id)
+        if streak.last_active_date == day:
+            return streak
+        if streak.last_active_date is not None and day < streak.last_active_date:
+            # A back-dated session may bridge a gap anywhere in history
+            return cls.refresh(user_id)
+        streak.last_run, streak.longest_streak, streak.last_active_date = extend_streak(
+            streak.last_run, streak.longest_streak, streak.last_active_date, day)
+        streak.save()
+        from . import leaderboards
+        leaderboards.record_streak(user_id, streak.longest_streak)
+        return streak
+
+    @classmethod
+    def refresh(cls, user_id):
+        """Recompute the user's streak in one pass over their active days."""
+        active_dates = DailyReadingStat.objects.filter(
+            user_id=user_id, session_count__gt=0
+        ).order_by('date').values_list('date', flat=True)
+        last_run, longest, last_active = compute_streaks(active_dates.iterator())
+        streak, _ = cls.objects.update_or_create(user_id=user_id, defaults={
+            'last_run': last_run,
+            'longest_streak': longest,
+            'last_active_date': last_active,
+        })
+        from . import leaderboards
+        leaderboards.record_streak(user_id, longest)
+        return streak
 
 class ReadingGoal(models.Model):
     GOAL_TYPES = (
@@ -148,6 +494,15 @@ class ReadingGoal(models.Model):
     end_date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_user(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_user(self.user_id)
+        return result
+
     def is_active(self):
         """Check if the goal is currently active."""
         today = timezone.now().date()
@@ -156,23 +511,20 @@ class ReadingGoal(models.Model):
     def get_pages_read_in_period(self):
         """Get total pages read within the goal period."""
         try:
-            # Get all reading sessions within the period
-            sessions = ReadingSession.objects.filter(
+            # Sum the daily rollups within the period
+            total_pages = DailyReadingStat.objects.filter(
                 user=self.user,
-                start_time__date__gte=self.start_date,
-                start_time__date__lte=self.end_date
-            )
-            
-            # Sum up pages read
-            total_pages = sessions.aggregate(
-                total=models.Sum('pages_read')
+                date__gte=self.start_date,
+                date__lte=self.end_date
+            ).aggregate(
+                total=models.Sum('pages')
             )['total']
             
             return total_pages or 0
             
-        except Exception as e:
-            print(f"Error calculating pages read for goal {self.id}: {str(e)}")
-            print(f"Goal period: {self.start_date} to {self.end_date}")
+        except Exception:
+            logger.exception("Error calculating pages read for goal %s (period %s to %s)",
+                             self.id, self.start_date, self.end_date)
             return 0
 
     def get_books_completed_in_period(self):
@@ -182,15 +534,15 @@ class ReadingGoal(models.Model):
             completed_books = Book.objects.filter(
                 user=self.user,
                 status='CO',
-                readingsession__start_time__date__gte=self.start_date,
-                readingsession__start_time__date__lte=self.end_date
+                readingsession__start_time__gte=day_start(self.start_date),
+                readingsession__start_time__lt=day_start(self.end_date + timedelta(days=1))
             ).distinct()
             
             return completed_books.count()
             
-        except Exception as e:
-            print(f"Error calculating completed books for goal {self.id}: {str(e)}")
-            print(f"Goal period: {self.start_date} to {self.end_date}")
+        except Exception:
+            logger.exception("Error calculating completed books for goal %s (period %s to %s)",
+                             self.id, self.start_date, self.end_date)
             return 0
 
     def progress(self):
@@ -198,20 +550,20 @@ class ReadingGoal(models.Model):
         try:
             # Validate target pages
             if not self.target_pages or self.target_pages <= 0:
-                print(f"Invalid target pages for goal {self.id}: {self.target_pages}")
+                logger.debug("Invalid target pages for goal %s: %s", self.id, self.target_pages)
                 return 0
             
             # Get total pages read
             total_pages = self.get_pages_read_in_period()
-            print(f"Pages read for goal {self.id}: {total_pages} out of {self.target_pages}")
+            logger.debug("Pages read for goal %s: %s out of %s", self.id, total_pages, self.target_pages)
             
             # Calculate progress percentage
             progress = (total_pages / self.target_pages) * 100
             return min(round(progress, 1), 100)  # Round to 1 decimal and cap at 100%
             
-        except Exception as e:
-            print(f"Error calculating progress for goal {self.id}: {str(e)}")
-            print(f"Target pages: {self.target_pages}")
+        except Exception:
+            logger.exception("Error calculating progress for goal %s (target pages %s)",
+                             self.id, self.target_pages)
             return 0
 
     def books_progress(self):
@@ -228,9 +580,9 @@ class ReadingGoal(models.Model):
             progress = (completed_books / self.target_books) * 100
             return min(round(progress, 1), 100)  # Round to 1 decimal and cap at 100%
             
-        except Exception as e:
-            print(f"Error calculating books progress for goal {self.id}: {str(e)}")
-            print(f"Target books: {self.target_books}")
+        except Exception:
+            logger.exception("Error calculating books progress for goal %s (target books %s)",
+                             self.id, self.target_books)
             return 0
 
     def __str__(self):
@@ -238,4 +590,66 @@ class ReadingGoal(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'start_date', 'end_date'], name='goal_user_period_idx'),
+        ]
+
+
+class CatalogEntry(models.Model):
+    """A book from an open bibliographic dump, for ISBN auto-fill without a network call.
+
+    ``title_key`` and ``author_key`` are folded to lowercase ASCII words so
+    prefix lookups are plain index range scans.
+    """
+    isbn13 = models.CharField(max_length=13, unique=True)
+    isbn10 = models.CharField(max_length=10, blank=True, db_index=True)
+    title = models.CharField(max_length=200)
+    author = models.CharField(max_length=200, blank=True)
+    total_pages = models.IntegerField(null=True, blank=True)
+    genre = models.CharField(max_length=20, blank=True)
+    title_key = models.CharField(max_length=200, db_index=True)
+    author_key = models.CharField(max_length=200, db_index=True)
+
+    def __str__(self):
+        return f"{self.title} ({self.isbn13})"
+
+    class Meta:
+        verbose_name_plural = 'catalog entries'
 
+class LeaderboardEntry(models.Model):
+    """A public profile's score on one leaderboard for one period."""
+    BOARDS = (
+        ('week', 'Pages this week'),
+        ('month', 'Pages this month'),
+        ('year', 'Pages this year'),
+        ('streak', 'Longest streak'),
+    )
+
+    board = models.CharField(max_length=10, choices=BOARDS)
+    # First day of the period; the streak board has a single period
+    period = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    score = models.IntegerField()
+
+    def __str__(self):
+        return f"{self.user.username}: {self.score} ({self.board} from {self.period})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'period', 'user'], name='unique_leaderboard_entry'),
+        ]
+        indexes = [
+            models.Index(F('board'), F('period'), F('score').desc(), F('user'), name='leaderboard_top_idx'),
+        ]
+
+class LeaderboardCount(models.Model):
+    """One node of a per-board Fenwick tree counting entries by score, for O(log n) ranks."""
+    board = models.CharField(max_length=10)
+    period = models.DateField()
+    node = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'period', 'node'], name='unique_leaderboard_count'),
+        ]
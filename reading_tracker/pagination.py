@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+
+class StandardCursorPagination(CursorPagination):
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class CreatedCursorPagination(StandardCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class StartTimeCursorPagination(StandardCursorPagination):
+    ordering = ('-start_time', '-id')
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset for the HTML views."""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def _encode_cursor(values):
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    # binascii.Error from a bad base64 string is a ValueError
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        timestamp, pk = values
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_page(queryset, field, cursor=None, page_size=20):
+    """Return the page after ``cursor`` ordered by ``(-field, -id)``.
+
+    Seeks with ``WHERE (field, id) < (cursor)`` instead of OFFSET, so deep
+    pages cost the same as the first one. A malformed cursor restarts from
+    the first page.
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    position = _decode_cursor(cursor) if cursor else None
+    if position:
+        value, pk = position
+        queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = _encode_cursor([getattr(last, field), last.pk])
+    return KeysetPage(items, next_cursor)
@@ -0,0 +1,204 @@
+"""Full-text search over books and reading session notes.
+
+On SQLite each indexed table has an external-content FTS5 table kept in
+sync by triggers, so bulk inserts and queryset updates are indexed too.
+On PostgreSQL each table has a stored, generated ``search_vector`` column
+with a GIN index. Other backends fall back to ``icontains`` filters.
+
+Queries are split into words and every word must match as a prefix, so
+"tolk hob" finds "The Hobbit" by J.R.R. Tolkien.
+"""
+import re
+from dataclasses import dataclass
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Book, ReadingSession
+
+# Longer queries only make the match stricter, not better
+MAX_TERMS = 8
+TERM = re.compile(r'[^\W_]+')
+PG_CONFIG = 'english'
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    model: type
+    # (column, PostgreSQL weight, FTS5 bm25 weight), most important first
+    columns: tuple
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def fts_table(self):
+        return f'{self.table}_fts'
+
+    @property
+    def column_names(self):
+        return [column for column, _, _ in self.columns]
+
+
+BOOK_INDEX = SearchIndex(Book, (('title', 'A', 10.0), ('author', 'B', 5.0), ('isbn', 'A', 10.0)))
+SESSION_INDEX = SearchIndex(ReadingSession, (('notes', 'A', 1.0),))
+INDEXES = (BOOK_INDEX, SESSION_INDEX)
+
+
+def terms(query):
+    return TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def highlight(text, words):
+    """Escape ``text`` and wrap the words starting with any of ``words`` in <mark>."""
+    text = escape(text)
+    if not words:
+        return mark_safe(text)
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(escape(word)) for word in words) + r')\w*', re.IGNORECASE)
+    return mark_safe(pattern.sub(lambda match: f'<mark>{match.group(0)}</mark>', text))
+
+
+# Schema (created by migration 0008)
+
+def _sqlite_triggers(index):
+    columns = ', '.join(index.column_names)
+    new = ', '.join(f'new.{column}' for column in index.column_names)
+    old = ', '.join(f'old.{column}' for column in index.column_names)
+    fts, table = index.fts_table, index.table
+    delete = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new});"
+    return [
+        f'CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END',
+        f'CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END',
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} END',
+    ]
+
+
+def _drop_sqlite_triggers(index):
+    return [f'DROP TRIGGER IF EXISTS {index.fts_table}_{suffix}' for suffix in ('ai', 'ad', 'au')]
+
+
+def restore_triggers(using='default', **kwargs):
+    """post_migrate handler: put back SQLite triggers dropped by a table rebuild.
+
+    SQLite migrations that alter a column copy the table and drop the
+    original, and its triggers go with it.
+    """
+    from django.db import connections
+
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        for index in INDEXES:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [index.fts_table])
+            if cursor.fetchone() is None:
+                continue
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                           [f'{index.fts_table}_a_'])
+            if cursor.fetchone()[0] == 3:
+                continue
+            for sql in _drop_sqlite_triggers(index) + _sqlite_triggers(index):
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {index.fts_table}({index.fts_table}) VALUES ('rebuild')")
+
+
+# Queries
+
+def _match(index, words):
+    """(FROM/WHERE sql, params, ORDER BY sql) matching every word, or None on other backends."""
+    if connection.vendor == 'sqlite':
+        fts = index.fts_table
+        weights = ', '.join(str(weight) for _, _, weight in index.columns)
+        expression = ' '.join(f'"{word}"*' for word in words)
+        return (f'{fts} JOIN {index.table} ON {index.table}.id = {fts}.rowid WHERE {fts} MATCH %s',
+                [expression], f'bm25({fts}, {weights}), {index.table}.id DESC')
+    if connection.vendor == 'postgresql':
+        expression = ' & '.join(f'{word}:*' for word in words)
+        return (f"{index.table}, to_tsquery('{PG_CONFIG}', %s) query WHERE {index.table}.search_vector @@ query",
+                [expression], f'ts_rank_cd({index.table}.search_vector, query) DESC, {index.table}.id DESC')
+    return None
+
+
+def _fallback(index, words):
+    condition = Q()
+    for word in words:
+        condition &= Q(*[(f'{column}__icontains', word) for column in index.column_names], _connector=Q.OR)
+    return index.model.objects.filter(condition)
+
+
+def matching(index, query):
+    """``index.model`` queryset filter for rows matching ``query``, unranked (for the admin)."""
+    words = terms(query)
+    if not words:
+        return index.model.objects.none()
+    match = _match(index, words)
+    if match is None:
+        return _fallback(index, words)
+    sql, params, _ = match
+    return index.model.objects.filter(pk__in=RawSQL(f'SELECT {index.table}.id FROM {sql}', params))
+
+
+class RankedSearch:
+    """Best matches first, as a sequence ``Paginator`` can count and slice.
+
+    Only the requested page of ids is ranked and fetched; the rows are
+    loaded with ``queryset`` so callers can add ``select_related``.
+    """
+
+    def __init__(self, index, query, user=None, queryset=None):
+        self.index = index
+        self.words = terms(query)
+        self.user = user
+        self.queryset = queryset if queryset is not None else index.model.objects.all()
+        self._count = None
+
+    def _sql(self):
+        sql, params, order = _match(self.index, self.words)
+        if self.user is not None:
+            sql += f' AND {self.index.table}.user_id = %s'
+            params = params + [self.user.pk]
+        return sql, params, order
+
+    def _fallback(self):
+        results = _fallback(self.index, self.words)
+        if self.user is not None:
+            results = results.filter(user=self.user)
+        return results
+
+    def count(self):
+        if self._count is None:
+            if not self.words:
+                self._count = 0
+            elif _match(self.index, self.words) is None:
+                self._count = self._fallback().count()
+            else:
+                sql, params, _ = self._sql()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT count(*) FROM {sql}', params)
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop if key.stop is not None else self.count()
+        if not self.words or stop <= start:
+            return []
+        if _match(self.index, self.words) is None:
+            return list(self.queryset.filter(pk__in=self._fallback().values('pk')).order_by('-pk')[start:stop])
+
+        sql, params, order = self._sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT {self.index.table}.id FROM {sql} ORDER BY {order} LIMIT %s OFFSET %s',
+                           params + [stop - start, start])
+            ids = [row[0] for row in cursor.fetchall()]
+        rows = self.queryset.in_bulk(ids)
+        return [rows[pk] for pk in ids if pk in rows]
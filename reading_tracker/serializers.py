@@ -0,0 +1,111 @@
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Book, ReadingSession, ReadingGoal
+
+
+class SparseFieldsMixin:
+    """Limit output to the comma-separated ``?fields=`` query parameter, if given."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        requested = request.query_params.get('fields')
+        if requested:
+            allowed = {name.strip() for name in requested.split(',') if name.strip()}
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+
+
+class BookSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    genre_display = serializers.CharField(source='get_genre_display', read_only=True)
+
+    class Meta:
+        model = Book
+        fields = ['id', 'title', 'author', 'isbn', 'total_pages', 'genre', 'genre_display', 'status',
+                  'cover_image', 'pages_read', 'progress', 'created_at', 'updated_at']
+        read_only_fields = ['pages_read', 'progress', 'created_at', 'updated_at']
+
+    def validate_total_pages(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Total pages must be greater than 0.")
+        return value
+
+
+class ReadingSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    book_title = serializers.CharField(source='book.title', read_only=True)
+
+    class Meta:
+        model = ReadingSession
+        fields = ['id', 'book', 'book_title', 'pages_read', 'start_time', 'end_time', 'notes', 'created_at']
+        read_only_fields = ['created_at']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if 'book' in self.fields and request is not None and request.user.is_authenticated:
+            self.fields['book'].queryset = Book.objects.filter(user=request.user)
+
+    def validate_pages_read(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Pages read must be greater than 0.")
+        return value
+
+    def validate(self, attrs):
+        start_time = attrs.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = attrs.get('end_time', getattr(self.instance, 'end_time', None))
+        if start_time and end_time:
+            if end_time <= start_time:
+                raise serializers.ValidationError("End time must be after start time.")
+            if (end_time - start_time).total_seconds() > 86400:
+                raise serializers.ValidationError("Reading session duration cannot exceed 24 hours.")
+
+        # Same page cap as add_reading_session, using the book's stored total
+        book = attrs.get('book', getattr(self.instance, 'book', None))
+        pages_read = attrs.get('pages_read', getattr(self.instance, 'pages_read', None))
+        if book and pages_read:
+            already_read = book.pages_read
+            if self.instance is not None and self.instance.book_id == book.pk:
+                already_read -= self.instance.pages_read
+            if already_read + pages_read > book.total_pages:
+                raise serializers.ValidationError(
+                    {'pages_read': f"Total pages read would exceed book's total pages ({book.total_pages})"})
+        return attrs
+
+
+class ReadingGoalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    is_active = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReadingGoal
+        fields = ['id', 'goal_type', 'target_pages', 'target_books', 'start_date', 'end_date',
+                  'is_active', 'created_at']
+        read_only_fields = ['created_at']
+
+    def get_is_active(self, goal):
+        return goal.start_date <= timezone.localdate() <= goal.end_date
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError("End date must be after start date.")
+        return attrs
+
+
+class SessionIngestRowSerializer(serializers.Serializer):
+    """One row of a bulk session upload; book ownership and page caps are checked per batch."""
+    book = serializers.IntegerField()
+    pages_read = serializers.IntegerField(min_value=1)
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        if attrs['end_time'] <= attrs['start_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        if (attrs['end_time'] - attrs['start_time']).total_seconds() > 86400:
+            raise serializers.ValidationError("Reading session duration cannot exceed 24 hours.")
+        return attrs
@@ -0,0 +1,134 @@
+"""Storage backends.
+
+Uploads are stored as ``<upload_to>/<aa>/<sha256><ext>``, so identical
+files are written once no matter how many books or profiles use them.
+``StoredFile`` keeps a reference count per stored name; the file and its
+derivatives are deleted when the last reference is released.
+
+Static files are fingerprinted by the manifest storage and get gzip (and,
+when the ``brotli`` package is installed, brotli) copies at collectstatic.
+"""
+import gzip
+import hashlib
+import posixpath
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{64}(\.|$)')
+DERIVATIVE_DIR = 'derivatives'
+
+# Manifest names look like css/style.3f2a1b4c5d6e.css
+FINGERPRINTED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt', '.html', '.map', '.ttf', '.eot', '.xml')
+# Compressing tiny files costs more in headers than it saves
+MIN_COMPRESS_SIZE = 512
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME.search(name))
+
+
+class ContentHashStorage(FileSystemStorage):
+    content_addressed = True
+
+    def save(self, name, content, max_length=None):
+        directory, filename = posixpath.split(name)
+        if posixpath.basename(directory) == DERIVATIVE_DIR:
+            # Derivative names already derive from a hashed original
+            return super().save(name, content, max_length=max_length)
+
+        digest = content_hash(content)
+        ext = posixpath.splitext(filename)[1].lower()
+        hashed = posixpath.join(directory, digest[:2], f'{digest}{ext}')
+        if not self.exists(hashed):
+            hashed = super().save(hashed, content, max_length=max_length)
+        self.retain(hashed, getattr(content, 'size', None) or self.size(hashed))
+        return hashed
+
+    def retain(self, name, size=0):
+        from .models import StoredFile
+
+        if StoredFile.objects.filter(name=name).update(references=F('references') + 1):
+            return
+        try:
+            with transaction.atomic():
+                StoredFile.objects.create(name=name, size=size, references=1)
+        except IntegrityError:
+            # Another upload of the same file created the row first
+            StoredFile.objects.filter(name=name).update(references=F('references') + 1)
+
+    def release(self, name):
+        """Drop one reference to ``name``; delete it and its derivatives at zero."""
+        from .images import ALL_SIZES, delete_derivatives
+        from .models import StoredFile
+
+        if not name:
+            return
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(name=name).first()
+            if stored is None:
+                return
+            if stored.references > 1:
+                StoredFile.objects.filter(pk=stored.pk).update(references=F('references') - 1)
+                return
+            stored.delete()
+        if self.exists(name):
+            self.delete(name)
+        delete_derivatives(name, ALL_SIZES, self)
+
+
+def is_fingerprinted_name(name):
+    return bool(FINGERPRINTED_NAME.search(name))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes .gz and .br copies of each hashed file."""
+    # Fall back to the plain name for files collected before they were
+    # added (e.g. assets not vendored yet) instead of raising
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+                continue
+            with self.open(name) as original:
+                content = original.read()
+            if len(content) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, compressed in self.compress(content):
+                if len(compressed) < len(content):
+                    if self.exists(name + suffix):
+                        self.delete(name + suffix)
+                    self._save(name + suffix, ContentFile(compressed))
+                    yield name + suffix, name + suffix, True
+
+    @staticmethod
+    def compress(content):
+        # mtime=0 keeps the output stable, so unchanged files compress identically
+        yield '.gz', gzip.compress(content, compresslevel=9, mtime=0)
+        if brotli is not None:
+            yield '.br', brotli.compress(content, quality=11)
@@ -0,0 +1,51 @@
+"""Reading streak calculations.
+
+Streaks are computed from the distinct days a user read on, which the
+``DailyReadingStat`` rollup already provides in sorted order.
+"""
+from datetime import date, timedelta
+
+ONE_DAY = timedelta(days=1)
+EPOCH = date(1970, 1, 1)
+
+
+def compute_streaks(active_dates):
+    """Walk ascending, distinct active dates once.
+
+    Returns ``(last_run, longest, last_active_date)`` where ``last_run`` is
+    the length of the run of consecutive days ending on ``last_active_date``.
+    """
+    last_run = longest = 0
+    last_active = None
+    for day in active_dates:
+        if last_active is not None and day - last_active == ONE_DAY:
+            last_run += 1
+        else:
+            last_run = 1
+        if last_run > longest:
+            longest = last_run
+        last_active = day
+    return last_run, longest, last_active
+
+
+def extend_streak(last_run, longest, last_active, day):
+    """Add a newly active ``day`` on or after ``last_active`` without rescanning history."""
+    if last_active is not None and day <= last_active:
+        return last_run, longest, last_active
+    if last_active is not None and day - last_active == ONE_DAY:
+        last_run += 1
+    else:
+        last_run = 1
+    return last_run, max(longest, last_run), day
+
+
+def current_streak(last_run, last_active, today):
+    """A run still counts as current if it ends today or yesterday."""
+    if last_active is None or (today - last_active) > ONE_DAY:
+        return 0
+    return last_run
+
+
+def day_timestamp(day):
+    """Unix timestamp of midnight UTC for ``day``, as Cal-Heatmap expects."""
+    return (day - EPOCH).days * 86400
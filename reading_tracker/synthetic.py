@@ -0,0 +1,144 @@
+"""Synthetic reading data at configurable scale, for local profiling.
+
+Users get books across every genre, sessions spread over several years
+(evening-heavy, in runs of consecutive days), and goals of every type.
+Sessions go through ``bulk_add_sessions``, so book totals, daily rollups
+and streaks come out exactly as if they had been logged by hand.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .ingest import bulk_add_sessions
+from .models import Book, ReadingGoal, ReadingSession, UserProfile
+
+GENRES = [
+    code
+    for _, subcategories in Book.GENRE_CHOICES
+    for code, _ in (subcategories if isinstance(subcategories, tuple) else ())
+]
+GOAL_LENGTHS = {'D': 1, 'W': 7, 'M': 30, 'Y': 365}
+
+# Relative weight of each hour of the day for session start times
+HOUR_WEIGHTS = [1, 0, 0, 0, 0, 1, 3, 4, 3, 2, 2, 2, 3, 3, 2, 2, 3, 4, 5, 6, 8, 9, 8, 4]
+
+# Share of books that end up completed, in progress, abandoned or unread
+OUTCOMES = (('CO', 0.55), ('CR', 0.15), ('AB', 0.1), ('TB', 0.2))
+
+WORDS = ('Silent', 'Golden', 'Last', 'Hidden', 'Broken', 'River', 'Empire', 'Garden', 'Night', 'Stone',
+         'Memory', 'Winter', 'Glass', 'Paper', 'Storm', 'Machine', 'House', 'Ocean', 'Shadow', 'Letter')
+SURNAMES = ('Okafor', 'Lindqvist', 'Tanaka', 'Moreau', 'Silva', 'Novak', 'Haddad', 'Kowalski', 'Reyes', 'Brennan')
+
+
+@dataclass
+class GeneratedData:
+    users: int = 0
+    books: int = 0
+    sessions: int = 0
+    goals: int = 0
+
+
+def _outcome(rng):
+    roll = rng.random()
+    for status, share in OUTCOMES:
+        if roll < share:
+            return status
+        roll -= share
+    return 'TB'
+
+
+def _sessions_for(rng, book, status, first_day, last_day):
+    """Sessions for one book: runs of 15-90 minute reads until the outcome's page count is reached."""
+    if status == 'TB':
+        return []
+    target = book.total_pages if status == 'CO' else rng.randint(1, max(1, book.total_pages - 1))
+    if status == 'AB':
+        target = max(1, target // 3)
+
+    span = max(0, (last_day - first_day).days)
+    day = first_day + timedelta(days=rng.randint(0, span))
+    sessions = []
+    read = 0
+    while read < target and day <= last_day:
+        minutes = rng.randint(15, 90)
+        pages = min(target - read, max(1, int(minutes * rng.uniform(0.5, 1.5))))
+        hour = rng.choices(range(24), weights=HOUR_WEIGHTS)[0]
+        start = timezone.make_aware(datetime.combine(day, time(hour, rng.randint(0, 59))))
+        sessions.append(ReadingSession(
+            book_id=book.pk,
+            pages_read=pages,
+            start_time=start,
+            end_time=start + timedelta(minutes=minutes),
+            notes=rng.choice(('', '', '', 'Great chapter.', 'Slow going.', 'Could not put it down.')),
+        ))
+        read += pages
+        # Mostly read on consecutive days, with the occasional break
+        day += timedelta(days=1 if rng.random() < 0.7 else rng.randint(2, 10))
+    return sessions
+
+
+def generate(users=10, books=50, years=3, prefix='reader', password='password', seed=None):
+    """Create ``users`` users with ``books`` books each and their reading history."""
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    first_day = today - timedelta(days=365 * years)
+    result = GeneratedData()
+
+    taken = set(User.objects.filter(username__startswith=prefix).values_list('username', flat=True))
+    index = 0
+    while result.users < users:
+        username = f'{prefix}{index}'
+        index += 1
+        if username in taken:
+            continue
+        with transaction.atomic():
+            user = User.objects.create_user(username, f'{username}@example.com', password)
+            UserProfile.objects.create(user=user, is_public=rng.random() < 0.5)
+
+            library = Book.objects.bulk_create([
+                Book(
+                    user=user,
+                    title=f'The {rng.choice(WORDS)} {rng.choice(WORDS)}',
+                    author=f'{rng.choice("ABCDEFGHJKLMNPRSTW")}. {rng.choice(SURNAMES)}',
+                    isbn=''.join(rng.choice('0123456789') for _ in range(13)),
+                    total_pages=rng.randint(80, 900),
+                    genre=rng.choice(GENRES),
+                )
+                for _ in range(books)
+            ])
+
+            sessions = []
+            abandoned = []
+            for book in library:
+                status = _outcome(rng)
+                if status == 'AB':
+                    abandoned.append(book.pk)
+                sessions += _sessions_for(rng, book, status, first_day, today)
+            if sessions:
+                bulk_add_sessions(user, sessions)
+            Book.objects.filter(pk__in=abandoned).update(status='AB')
+
+            goals = []
+            for goal_type, days in GOAL_LENGTHS.items():
+                # One current goal and a few past ones of each type
+                for offset in range(4):
+                    end = today - timedelta(days=days * offset)
+                    goals.append(ReadingGoal(
+                        user=user,
+                        goal_type=goal_type,
+                        target_pages=days * rng.randint(20, 60),
+                        target_books=max(0, days // 30),
+                        start_date=end - timedelta(days=days - 1),
+                        end_date=end,
+                    ))
+            ReadingGoal.objects.bulk_create(goals)
+
+        result.users += 1
+        result.books += len(library)
+        result.sessions += len(sessions)
+        result.goals += len(goals)
+    return result
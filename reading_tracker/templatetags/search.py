@@ -0,0 +1,11 @@
+from django import template
+
+from ..search import highlight as highlight_terms, terms
+
+register = template.Library()
+
+
+@register.filter
+def highlight(text, query):
+    """Mark the words in ``text`` that match ``query``, escaping everything else."""
+    return highlight_terms(text or '', terms(query or ''))
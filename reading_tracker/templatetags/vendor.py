@@ -0,0 +1,23 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from ..assets import VENDOR_ASSETS, is_vendored
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor(name, defer=False):
+    """Render the <link> or <script> tag for a vendored asset.
+
+    Points at the fingerprinted local copy once ``vendor_assets`` has been
+    run, and at the pinned CDN URL until then (system check W001 says so).
+    """
+    path, cdn_url, _ = VENDOR_ASSETS[name]
+    url = static(path) if is_vendored(name) else cdn_url
+    if path.endswith('.css'):
+        return format_html('<link href="{}" rel="stylesheet">', url)
+    if defer:
+        return format_html('<script src="{}" defer></script>', url)
+    return format_html('<script src="{}"></script>', url)
@@ -1,3 +1,957 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import os
+import random
+import re
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core import checks
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.test import AsyncClient, Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import assets, benchmark, catalog, images, leaderboards, live, search, synthetic
+from .streaks import compute_streaks
+from .views import accepted_encodings, serve_media
+from .models import (Book, CatalogEntry, DailyReadingStat, LeaderboardCount, LeaderboardEntry, ReadingGoal,
+                     ReadingSession, ReadingStreak, StoredFile, UserProfile)
+
+# Queries per view for a logged-in user with a cold cache, including the
+# session and user lookups. Lower a budget when a view gets cheaper; a test
+# failing because a count went up means the change added queries.
+QUERY_BUDGETS = {
+    'home': 2,
+    'login': 2,
+    'register': 2,
+    'dashboard': 10,
+    'analytics_dashboard': 7,
+    'profile': 10,
+    'edit_profile': 3,
+    'export_history': 5,
+    'genre_distribution': 3,
+    'book_status_data': 3,
+    'dashboard_data': 4,
+    'reading_activity_data': 4,
+    'reading_progress_data': 4,
+    'catalog_lookup': 2,
+    'catalog_autocomplete': 2,
+    'api-root': 2,
+    'api-book-list': 3,
+    'api-book-detail': 3,
+    'api-session-list': 3,
+    'api-session-detail': 3,
+    'api-session-bulk': 2,
+    'api-goal-list': 3,
+    'api-goal-detail': 3,
+    'book_list': 3,
+    'book_list_page': 3,
+    'add_book': 2,
+    'import_library': 2,
+    'book_detail': 5,
+    'book_sessions_page': 4,
+    'edit_book': 3,
+    'delete_book': 3,
+    'add_reading_session': 3,
+    'reading_goals': 5,
+    'add_goal': 2,
+    'edit_goal': 3,
+    'delete_goal': 3,
+    'search': 2,
+    'leaderboard': 5,
+    'metrics': 2,
+}
+
+# Views whose templates don't exist yet, so they can't be measured
+UNBUDGETED = {'mark_book_completed', 'session_detail', 'edit_session', 'delete_session'}
+
+
+class ViewQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        synthetic.generate(users=2, books=12, years=1, prefix='budget', seed=21)
+        cls.user = User.objects.get(username='budget0')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client(raise_request_exception=False)
+        self.client.force_login(self.user)
+
+    def test_every_view_has_a_budget(self):
+        names = {name for name, _ in benchmark.targets(self.user)}
+        self.assertEqual(names - UNBUDGETED, set(QUERY_BUDGETS))
+
+    def test_query_budgets(self):
+        for name, path in benchmark.targets(self.user):
+            if name in UNBUDGETED:
+                continue
+            with self.subTest(view=name):
+                cache.clear()
+                with self.assertNumQueries(QUERY_BUDGETS[name]):
+                    response, _, _ = benchmark.fetch(self.client, path)
+                self.assertLess(response.status_code, 500)
+
+    def test_harness_reports_percentiles(self):
+        results = benchmark.run(self.user, iterations=3, names={'dashboard', 'book_list'})
+        self.assertEqual({timing.name for timing in results}, {'dashboard', 'book_list'})
+        for timing in results:
+            self.assertEqual(len(timing.samples), 3)
+            self.assertLessEqual(timing.p50, timing.p95)
+            self.assertLessEqual(timing.p95, timing.p99)
+            self.assertEqual(timing.queries, QUERY_BUDGETS[timing.name])
+
+
+class SyntheticDataTests(TestCase):
+    def test_generate(self):
+        result = synthetic.generate(users=2, books=5, years=1, prefix='synth', seed=1)
+        self.assertEqual(result.users, 2)
+        self.assertEqual(result.books, 10)
+        self.assertEqual(result.goals, 2 * 4 * len(synthetic.GOAL_LENGTHS))
+        user = User.objects.get(username='synth1')
+        self.assertEqual(user.book_set.count(), 5)
+        self.assertEqual(user.readinggoal_set.values('goal_type').distinct().count(), len(synthetic.GOAL_LENGTHS))
+        # Usernames that are already taken are skipped
+        self.assertEqual(synthetic.generate(users=1, books=1, prefix='synth').users, 1)
+        self.assertTrue(User.objects.filter(username='synth2').exists())
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('searcher', password='password')
+        cls.other = User.objects.create_user('other', password='password')
+        cls.hobbit = Book.objects.create(user=cls.user, title='The Hobbit', author='J.R.R. Tolkien',
+                                         isbn='9780547928227', total_pages=300, genre='FIC_SFF')
+        cls.biography = Book.objects.create(user=cls.user, title='Letters', author='Christopher Tolkien',
+                                            total_pages=200, genre='NON_BIO')
+        Book.objects.create(user=cls.other, title='The Hobbit', author='J.R.R. Tolkien', total_pages=300, genre='FIC_SFF')
+
+    def titles(self, query, user=None):
+        return [book.title for book in search.RankedSearch(search.BOOK_INDEX, query, user or self.user)[:10]]
+
+    def test_prefix_match_scoped_to_user(self):
+        self.assertEqual(self.titles('hob'), ['The Hobbit'])
+        self.assertEqual(self.titles('tolk hob'), ['The Hobbit'])
+        self.assertEqual(search.RankedSearch(search.BOOK_INDEX, 'tolkien', self.user).count(), 2)
+        self.assertEqual(self.titles('9780547'), ['The Hobbit'])
+        self.assertEqual(self.titles('"; DROP TABLE'), [])
+        self.assertEqual(self.titles(''), [])
+
+    def test_title_matches_rank_above_author_matches(self):
+        Book.objects.create(user=self.user, title='Tolkien: A Life', author='H. Carpenter', total_pages=100, genre='NON_BIO')
+        self.assertEqual(self.titles('tolkien')[0], 'Tolkien: A Life')
+
+    def test_index_follows_updates_and_deletes(self):
+        Book.objects.filter(pk=self.biography.pk).update(title='Collected Letters')
+        self.assertEqual(self.titles('collected'), ['Collected Letters'])
+        self.biography.delete()
+        self.assertEqual(self.titles('letters'), [])
+
+    def test_session_notes(self):
+        ReadingSession.objects.bulk_create([
+            ReadingSession(user=self.user, book=self.hobbit, pages_read=10, start_time=timezone.now(),
+                           end_time=timezone.now(), notes='Riddles in the dark'),
+        ])
+        results = search.RankedSearch(search.SESSION_INDEX, 'riddle', self.user)
+        self.assertEqual([session.notes for session in results[:10]], ['Riddles in the dark'])
+        self.assertEqual(search.RankedSearch(search.SESSION_INDEX, 'riddle', self.other).count(), 0)
+
+    def test_search_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('search'), {'q': 'hobb'})
+        self.assertContains(response, '<mark>Hobbit</mark>', html=False)
+        self.assertEqual(response.context['book_count'], 1)
+
+    def test_admin_search(self):
+        admin_user = User.objects.create_superuser('admin', password='password')
+        self.client.force_login(admin_user)
+        response = self.client.get(reverse('admin:reading_tracker_book_changelist'), {'q': 'hobbit'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_highlight_escapes(self):
+        self.assertEqual(search.highlight('<b>Hobbit</b>', ['hob']), '&lt;b&gt;<mark>Hobbit</mark>&lt;/b&gt;')
+
+
+class CatalogTests(TestCase):
+    CSV = [
+        'bookID,title,authors,isbn,isbn13,  num_pages,genres\n',
+        '1,The Hobbit,J.R.R. Tolkien/Christopher Tolkien,0547928211,,300,"fantasy, classics"\n',
+        '2,Dune,Frank Herbert,,9780441172719,412,science fiction\n',
+        '3,No ISBN,Someone,,,100,\n',
+        '4,Bad Checksum,Someone,0547928212,,100,\n',
+    ]
+
+    def setUp(self):
+        catalog.clear_cache()
+        catalog.load(catalog.parse_csv(self.CSV))
+
+    def test_isbn_normalisation(self):
+        self.assertEqual(catalog.clean_isbn('0-547-92821-1'), '0547928211')
+        self.assertEqual(catalog.clean_isbn('0547928212'), '')
+        self.assertEqual(catalog.clean_isbn('080442957x'), '080442957X')
+        self.assertEqual(catalog.to_isbn13('0547928211'), '9780547928210')
+        self.assertEqual(catalog.to_isbn10('9780441172719'), '0441172717')
+        self.assertEqual(catalog.to_isbn10('9798886450000'), '')
+        self.assertEqual(catalog.prefix_key('The Élan of  Virgil!'), 'elan of virgil')
+
+    def test_load(self):
+        self.assertEqual(CatalogEntry.objects.count(), 2)
+        hobbit = catalog.lookup_isbn('978-0-547-92821-0')
+        self.assertEqual((hobbit['title'], hobbit['author'], hobbit['total_pages'], hobbit['genre']),
+                         ('The Hobbit', 'J.R.R. Tolkien', 300, 'FIC_SFF'))
+        self.assertEqual(catalog.lookup_isbn('0441172717')['title'], 'Dune')
+        self.assertIsNone(catalog.lookup_isbn('9780000000002'))
+        # Loading again updates in place
+        catalog.load(catalog.parse_csv([self.CSV[0], '2,Dune (Deluxe),Frank Herbert,,9780441172719,600,\n']))
+        self.assertEqual(CatalogEntry.objects.count(), 2)
+        self.assertEqual(catalog.lookup_isbn('9780441172719')['total_pages'], 600)
+
+    def test_parse_openlibrary(self):
+        record = ('{"title": "Dune", "subtitle": "Deluxe Edition", "isbn_13": ["9780441172719"], '
+                  '"number_of_pages": 412, "by_statement": "by Frank Herbert.", "subjects": ["Science fiction"]}')
+        rows = list(catalog.parse_openlibrary([f'/type/edition\t/books/OL1M\t1\t2020-01-01\t{record}\n', 'garbage\n']))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][:6], ('9780441172719', '0441172717', 'Dune: Deluxe Edition', 'Frank Herbert', 412, 'FIC_SFF'))
+
+    def test_autocomplete(self):
+        self.assertEqual([entry['title'] for entry in catalog.autocomplete('hob')], ['The Hobbit'])
+        self.assertEqual([entry['title'] for entry in catalog.autocomplete('frank h')], ['Dune'])
+        self.assertEqual(catalog.autocomplete('h'), [])
+        self.assertEqual(catalog.matching('frank').count(), 1)
+
+    def test_add_book_fills_in_from_isbn(self):
+        user = User.objects.create_user('reader', password='password')
+        self.client.force_login(user)
+        response = self.client.post(reverse('add_book'), {'isbn': '0547928211', 'status': 'TB'})
+        self.assertRedirects(response, reverse('book_list'))
+        book = Book.objects.get(user=user)
+        self.assertEqual((book.title, book.author, book.total_pages, book.genre),
+                         ('The Hobbit', 'J.R.R. Tolkien', 300, 'FIC_SFF'))
+
+        response = self.client.post(reverse('add_book'), {'isbn': '9780000000002', 'status': 'TB'})
+        self.assertFormError(response.context['form'], 'title', 'This field is required.')
+
+    def test_endpoints(self):
+        self.client.force_login(User.objects.create_user('reader', password='password'))
+        response = self.client.get(reverse('catalog_lookup'), {'isbn': '9780441172719'})
+        self.assertEqual(response.json()['title'], 'Dune')
+        self.assertEqual(self.client.get(reverse('catalog_lookup'), {'isbn': 'nope'}).status_code, 404)
+        response = self.client.get(reverse('catalog_autocomplete'), {'q': 'du'})
+        self.assertEqual([entry['isbn13'] for entry in response.json()['results']], ['9780441172719'])
+
+
+class LeaderboardTests(TestCase):
+    def make_reader(self, name, public=True):
+        user = User.objects.create_user(name, password='password')
+        UserProfile.objects.create(user=user, is_public=public)
+        book = Book.objects.create(user=user, title='Book', author='Author', total_pages=1000, genre='FIC_LIT')
+        return user, book
+
+    def read(self, book, pages, when=None):
+        start = when or timezone.now()
+        ReadingSession.objects.create(user=book.user, book=book, pages_read=pages, start_time=start,
+                                      end_time=start + timedelta(minutes=30))
+
+    def score(self, user, board):
+        period = leaderboards.tracked_periods(board)[0]
+        return LeaderboardEntry.objects.filter(user=user, board=board, period=period).values_list(
+            'score', flat=True).first()
+
+    def test_ranks_match_a_full_count(self):
+        rng = random.Random(24)
+        period = leaderboards.tracked_periods('week')[0]
+        users = [User.objects.create_user(f'r{i}') for i in range(60)]
+        for _ in range(200):
+            leaderboards._set('week', period, rng.choice(users).pk, delta=rng.randint(-40, 60))
+        entries = list(LeaderboardEntry.objects.filter(board='week', period=period))
+        self.assertEqual(leaderboards.size('week', period), len(entries))
+        for entry in entries:
+            higher = sum(1 for other in entries if other.score > entry.score)
+            self.assertEqual(leaderboards.rank('week', period, entry.score), higher + 1)
+        ranks = [entry.rank for entry in leaderboards.top('week', period, offset=5, limit=20)]
+        self.assertEqual(ranks, sorted(ranks))
+
+    def test_sessions_update_public_profiles_only(self):
+        reader, book = self.make_reader('reader')
+        private, private_book = self.make_reader('private', public=False)
+        self.read(book, 40)
+        self.read(book, 10)
+        self.read(private_book, 500)
+        for board in leaderboards.PAGE_BOARDS:
+            self.assertEqual(self.score(reader, board), 50)
+            self.assertIsNone(self.score(private, board))
+        self.assertEqual(self.score(reader, 'streak'), 1)
+
+        ReadingSession.objects.filter(user=reader).first().delete()
+        self.assertIn(self.score(reader, 'week'), (10, 40))
+        # Older than the previous period: no board moves
+        self.read(book, 70, timezone.now() - timedelta(days=800))
+        self.assertIn(self.score(reader, 'year'), (10, 40))
+
+    def test_visibility_changes(self):
+        reader, book = self.make_reader('reader', public=False)
+        self.read(book, 30)
+        profile = reader.userprofile
+        profile.is_public = True
+        profile.save()
+        self.assertEqual(self.score(reader, 'month'), 30)
+        self.assertEqual(leaderboards.size('month', leaderboards.tracked_periods('month')[0]), 1)
+
+        profile.is_public = False
+        profile.save()
+        self.assertFalse(LeaderboardEntry.objects.filter(user=reader).exists())
+        self.assertEqual(leaderboards.size('month', leaderboards.tracked_periods('month')[0]), 0)
+
+    def test_deleting_a_user_keeps_ranks_right(self):
+        first, first_book = self.make_reader('first')
+        second, second_book = self.make_reader('second')
+        self.read(first_book, 100)
+        self.read(second_book, 50)
+        period = leaderboards.tracked_periods('week')[0]
+        self.assertEqual(leaderboards.rank('week', period, 50), 2)
+        first.delete()
+        self.assertEqual(leaderboards.rank('week', period, 50), 1)
+        self.assertEqual(leaderboards.size('week', period), 1)
+        self.assertEqual(leaderboards.rebuild(), 1)
+        self.assertEqual(leaderboards.rank('week', period, 50), 1)
+
+    def test_old_periods_are_pruned(self):
+        reader, book = self.make_reader('reader')
+        self.read(book, 30)
+        today = timezone.localdate()
+        self.assertEqual(leaderboards.prune(today), 0)
+
+        # A year on, this week's and this month's periods are long gone
+        later = today.replace(year=today.year + 1)
+        with mock.patch('django.utils.timezone.localdate', return_value=later):
+            self.assertEqual(leaderboards.prune(), 2)
+            call_command('prune_leaderboards', stdout=io.StringIO())
+        self.assertEqual(set(LeaderboardEntry.objects.values_list('board', flat=True)), {'year', 'streak'})
+        self.assertFalse(LeaderboardCount.objects.filter(board__in=['week', 'month']).exists())
+        self.assertEqual(leaderboards.size('year', leaderboards.tracked_periods('year')[0]), 1)
+
+    def test_page(self):
+        first, first_book = self.make_reader('first')
+        second, second_book = self.make_reader('second')
+        self.read(first_book, 100)
+        self.read(second_book, 50)
+        self.client.force_login(second)
+        response = self.client.get(reverse('leaderboard'), {'board': 'month'})
+        self.assertEqual(response.context['my_rank'], 2)
+        self.assertEqual([entry.user.username for entry in response.context['page']], ['first', 'second'])
+        self.assertEqual(self.client.get(reverse('leaderboard'), {'board': 'nope'}).status_code, 404)
+
+
+class LiveUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('live', password='password')
+        self.book = Book.objects.create(user=self.user, title='Book', author='Author', total_pages=300, genre='FIC_LIT')
+
+    async def test_notices_reach_only_the_users_streams(self):
+        with live.broker.subscribe(1) as first, live.broker.subscribe(1) as second, \
+                live.broker.subscribe(2) as other:
+            self.assertEqual(live.broker.listeners(1), 2)
+            # Published from a worker thread, as sync views do
+            await sync_to_async(live.broker.publish, thread_sensitive=False)(1)
+            self.assertTrue(await first.wait(1))
+            self.assertTrue(await second.wait(1))
+            self.assertFalse(await other.wait(0.05))
+        self.assertEqual(live.broker.listeners(1), 0)
+
+    def test_writes_publish_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.book.title = 'Renamed'
+            self.book.save()
+        self.assertEqual(len(callbacks), 2)  # version bump, then the notice
+
+    def test_live_updates_are_asgi_only(self):
+        self.client.force_login(self.user)
+        self.assertNotContains(self.client.get(reverse('dashboard')), 'data-live-url')
+        self.assertEqual(self.client.get(reverse('dashboard_events')).status_code, 204)
+
+    async def test_dashboard_links_its_stream_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse('dashboard'))
+        self.assertContains(response, f'data-live-url="{reverse("dashboard_events")}"')
+
+    def add_session(self, pages):
+        with self.captureOnCommitCallbacks(execute=True):
+            start = timezone.now()
+            ReadingSession.objects.create(user=self.user, book=self.book, pages_read=pages,
+                                          start_time=start, end_time=start + timedelta(minutes=20))
+
+    async def test_stream_sends_snapshot_then_deltas(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse('dashboard_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+
+        async def next_event():
+            chunk = (await asyncio.wait_for(anext(chunks), 5)).decode()
+            return json.loads(chunk.split('data: ', 1)[1])
+
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        snapshot = await next_event()
+        self.assertEqual((snapshot['total_books'], snapshot['total_pages']), (1, 0))
+        self.assertIsNone(snapshot['streak'])
+
+        await sync_to_async(self.add_session)(40)
+        changes = await next_event()
+        self.assertEqual(changes['total_pages'], 40)
+        self.assertEqual(changes['streak']['current'], 1)
+        self.assertEqual(changes['current_book']['progress'], 13.3)
+        self.assertNotIn('total_books', changes)
+        await chunks.aclose()
+
+
+class ReaderTestCase(TestCase):
+    """A logged-in user with a profile and one 100-page book."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', password='password')
+        UserProfile.objects.create(user=self.user)
+        self.client.force_login(self.user)
+        self.book = Book.objects.create(user=self.user, title='Book', author='Author', total_pages=100, genre='FIC_LIT')
+
+    def add_session(self, pages, start=None, minutes=30, book=None, notes=''):
+        start = start or timezone.now() - timedelta(hours=1)
+        return ReadingSession.objects.create(user=self.user, book=book or self.book, pages_read=pages, notes=notes,
+                                             start_time=start, end_time=start + timedelta(minutes=minutes))
+
+
+class RunningTotalTests(ReaderTestCase):
+    def assertBook(self, pages_read, progress, status):
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.pages_read, self.book.progress, self.book.status), (pages_read, progress, status))
+
+    def test_sessions_keep_the_book_total(self):
+        now = timezone.now()
+        response = self.client.post(reverse('add_reading_session', args=[self.book.pk]), {
+            'pages_read': 40,
+            'start_time': (now - timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M'),
+            'end_time': now.strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertBook(40, 40.0, 'CR')
+
+        session = ReadingSession.objects.get()
+        session.pages_read = 100
+        session.save()
+        self.assertBook(100, 100.0, 'CO')
+
+        ReadingSession.objects.get().delete()
+        self.assertBook(0, 0, 'TB')
+
+    def test_pages_move_with_the_session(self):
+        other = Book.objects.create(user=self.user, title='Other', author='Author', total_pages=50, genre='FIC_LIT')
+        session = self.add_session(20)
+        session.book = other
+        session.save()
+        self.assertBook(0, 0, 'TB')
+        other.refresh_from_db()
+        self.assertEqual(other.pages_read, 20)
+
+
+class DailyRollupTests(ReaderTestCase):
+    def rollups(self):
+        return list(DailyReadingStat.objects.order_by('date').values_list('pages', 'seconds_read', 'session_count'))
+
+    def test_sessions_roll_up_per_day(self):
+        noon = timezone.now().replace(hour=12)
+        self.add_session(10, noon, minutes=30)
+        second = self.add_session(5, noon, minutes=10)
+        self.assertEqual(self.rollups(), [(15, 2400, 2)])
+
+        second = ReadingSession.objects.get(pk=second.pk)
+        second.start_time -= timedelta(days=1)
+        second.end_time -= timedelta(days=1)
+        second.save()
+        self.assertEqual(self.rollups(), [(5, 600, 1), (10, 1800, 1)])
+
+        second.delete()
+        self.assertEqual(self.rollups(), [(10, 1800, 1)])
+        self.book.delete()
+        self.assertEqual(self.rollups(), [])
+
+    def test_backfill(self):
+        self.add_session(10, timezone.now().replace(hour=12), minutes=30)
+        DailyReadingStat.objects.all().delete()
+        call_command('backfill_daily_stats', stdout=io.StringIO())
+        self.assertEqual(self.rollups(), [(10, 1800, 1)])
+
+
+class StreakTests(ReaderTestCase):
+    def read_days_ago(self, days):
+        return self.add_session(1, timezone.now().replace(hour=12) - timedelta(days=days), minutes=5)
+
+    def streak(self):
+        streak = ReadingStreak.objects.get(user=self.user)
+        return streak.current_streak, streak.longest_streak
+
+    def test_compute_streaks(self):
+        days = [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 4)]
+        self.assertEqual(compute_streaks(days), (1, 2, date(2024, 1, 4)))
+        self.assertEqual(compute_streaks([]), (0, 0, None))
+
+    def test_sessions_join_and_split_streaks(self):
+        for days in (3, 2, 0):
+            self.read_days_ago(days)
+        self.assertEqual(self.streak(), (1, 2))
+
+        gap = self.read_days_ago(1)
+        self.assertEqual(self.streak(), (4, 4))
+        gap.delete()
+        self.assertEqual(self.streak(), (1, 2))
+
+        activity = self.client.get(reverse('reading_activity_data')).json()
+        self.assertEqual((activity['current_streak'], activity['longest_streak'], len(activity['data'])), (1, 2, 3))
+        self.assertContains(self.client.get(reverse('dashboard')), 'Reading Streak')
+
+
+class DashboardCacheTests(ReaderTestCase):
+    def test_dashboard_is_cached_until_a_write(self):
+        self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(2):  # session and user
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_books'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(user=self.user, title='Second', author='Author', total_pages=10, genre='FIC_LIT')
+        self.assertEqual(self.client.get(reverse('dashboard')).context['total_books'], 2)
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            ReadingGoal.objects.create(user=self.user, goal_type='D', target_pages=10, start_date=today, end_date=today)
+        self.assertIsNotNone(self.client.get(reverse('dashboard')).context['active_goal'])
+
+
+class VersionedJSONTests(ReaderTestCase):
+    def test_etag_revalidation(self):
+        for name in ('genre_distribution', 'book_status_data', 'reading_activity_data'):
+            with self.subTest(view=name):
+                url = reverse(name)
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(2):  # session and user
+                    self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                with self.assertNumQueries(2):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_a_write_changes_the_etag(self):
+        url = reverse('genre_distribution')
+        response = self.client.get(url)
+        self.assertEqual(response.json()['labels'], ['Literary Fiction'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(user=self.user, title='Second', author='Author', total_pages=10, genre='FIC_MYS')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['labels']), 2)
+
+
+    def test_versions_are_bumped_on_commit(self):
+        url = reverse('genre_distribution')
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                self.add_session(20)
+                # A concurrent request before the commit still sees the old version
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class RequestMetricsTests(ReaderTestCase):
+    def test_metrics_are_staff_only(self):
+        self.client.get(reverse('book_list'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'reading_tracker_db_queries_bucket{view="book_list",le="+Inf"}', response.content)
+
+
+class GoalEvaluationTests(ReaderTestCase):
+    def test_goals_are_evaluated_together(self):
+        self.add_session(100)
+        today = timezone.localdate()
+        for days in range(5):
+            ReadingGoal.objects.create(user=self.user, goal_type='W', target_pages=200, target_books=2,
+                                       start_date=today - timedelta(days=days), end_date=today + timedelta(days=1))
+        with self.assertNumQueries(5):  # session, user, goals, pages, books
+            response = self.client.get(reverse('reading_goals'))
+        goal = response.context['goals'][0]
+        self.assertEqual((goal.pages_read, goal.progress_percent, goal.books_completed, goal.books_progress_percent),
+                         (100, 50.0, 1, 50.0))
+        self.assertEqual((goal.progress(), goal.books_progress()), (50.0, 50.0))
+        self.assertEqual((goal.days_remaining, goal.pages_needed_per_day), (1, 100))
+        self.assertEqual(self.client.get(reverse('dashboard')).context['active_goal'].pages_read, 100)
+
+
+class AnalyticsTests(ReaderTestCase):
+    def test_aggregates(self):
+        self.add_session(30, minutes=60)
+        response = self.client.get(reverse('analytics_dashboard'), {'days': 30})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_stats']['total_time'], 1.0)
+        self.assertEqual(response.context['genre_stats'][0]['total_pages'], 30)
+        with self.assertNumQueries(2):  # cached: session and user only
+            self.client.get(reverse('analytics_dashboard'), {'days': 30})
+
+
+class RestAPITests(ReaderTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mystery = Book.objects.create(user=self.user, title='Mystery', author='Author', total_pages=500,
+                                           genre='FIC_MYS')
+        now = timezone.now()
+        for days in range(5):
+            self.add_session(5, now - timedelta(days=days, hours=1), book=self.mystery)
+
+    def test_pagination_and_sparse_fields(self):
+        response = self.client.get('/api/sessions/', {'page_size': 2, 'fields': 'id,book_title'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(set(data['results'][0]), {'id', 'book_title'})
+        with self.assertNumQueries(3):  # session, user, page
+            self.client.get(data['next'])
+
+    def test_filters(self):
+        self.assertEqual(len(self.client.get('/api/books/', {'genre': 'FIC_MYS'}).json()['results']), 1)
+        since = (timezone.now() - timedelta(days=1)).date()
+        self.assertEqual(len(self.client.get('/api/sessions/', {'start': since}).json()['results']), 2)
+        self.assertEqual(self.client.get('/api/goals/').status_code, 200)
+
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_date_filters_use_local_days(self):
+        # 23:30 on the 10th in New York is already the 11th in UTC
+        late = self.add_session(5, timezone.make_aware(datetime(2024, 3, 10, 23, 30)), minutes=20)
+        for day, expected in (('2024-03-10', [late.pk]), ('2024-03-11', [])):
+            results = self.client.get('/api/sessions/', {'start': day, 'end': day}).json()['results']
+            self.assertEqual([row['id'] for row in results], expected)
+
+    def test_create_session(self):
+        now = timezone.now()
+        session = {'book': self.book.pk, 'start_time': (now - timedelta(hours=1)).isoformat(), 'end_time': now.isoformat()}
+        response = self.client.post('/api/sessions/', {**session, 'pages_read': 200}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/sessions/', {**session, 'pages_read': 20}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.pages_read, 20)
+
+
+class BulkIngestTests(ReaderTestCase):
+    def session_rows(self, book, count, days_ago=0, pages=10):
+        noon = timezone.now().replace(hour=12)
+        return [{
+            'book': book.pk,
+            'pages_read': pages,
+            'start_time': (noon - timedelta(days=days_ago + i, hours=1)).isoformat(),
+            'end_time': (noon - timedelta(days=days_ago + i)).isoformat(),
+        } for i in range(count)]
+
+    def test_json_batch(self):
+        rows = self.session_rows(self.book, 10)
+        # The duplicate overshoots the book's pages, so the whole batch is rejected
+        response = self.client.post(reverse('api-session-bulk'), rows + [dict(rows[0])], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['errors']), 11)
+        self.assertFalse(ReadingSession.objects.exists())
+
+        response = self.client.post(reverse('api-session-bulk'), {'sessions': rows}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.pages_read, self.book.status), (100, 'CO'))
+        self.assertEqual(DailyReadingStat.objects.count(), 10)
+        self.assertEqual(ReadingStreak.objects.get().longest_streak, 10)
+
+    def test_csv_batch(self):
+        rows = self.session_rows(self.book, 3, days_ago=20, pages=5)
+        body = 'book,pages_read,start_time,end_time,notes\n' + ''.join(
+            f"{row['book']},{row['pages_read']},{row['start_time']},{row['end_time']},notes\n" for row in rows)
+        response = self.client.post(reverse('api-session-bulk'), body, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.pages_read, 15)
+
+
+class LibraryImportTests(ReaderTestCase):
+    def upload(self, name, content):
+        return self.client.post(reverse('import_library'), {'file': SimpleUploadedFile(name, content.encode())})
+
+    def test_goodreads_export(self):
+        header = 'Book Id,Title,Author,ISBN,ISBN13,Number of Pages,Date Read,Bookshelves,Exclusive Shelf\n'
+        rows = ''.join(
+            f'{i},"Book, {i}",Author {i},"=""0439023483""","=""97804390234{i:02d}""",{100 + i % 50},'
+            f'2023/{1 + i % 12:02d}/{1 + i % 28:02d},"fantasy, owned",{"read" if i % 2 else "to-read"}\n'
+            for i in range(100))
+        with self.assertNoLogs('reading_tracker', 'INFO'):
+            response = self.upload('goodreads.csv', header + rows)
+        self.assertRedirects(response, reverse('book_list'), fetch_redirect_response=False)
+        self.assertEqual([str(message) for message in get_messages(response.wsgi_request)],
+                         ['Imported 100 book(s) and 50 reading session(s). Skipped 0 row(s).'])
+        self.assertEqual(Book.objects.filter(user=self.user).count(), 101)
+        self.assertEqual(Book.objects.filter(status='CO', genre='FIC_SFF').count(), 50)
+        # Each finished book gets one session for its pages, rolled up by day
+        self.assertEqual(ReadingSession.objects.count(), 50)
+        self.assertEqual(sum(DailyReadingStat.objects.values_list('session_count', flat=True)), 50)
+
+    def test_storygraph_export(self):
+        export = ('Title,Authors,ISBN/UID,Read Status,Last Date Read,Dates Read,Tags\n'
+                  'Abandoned,"A, B",123,did-not-finish,,2023/01/05-2023/01/20,\n')
+        self.upload('storygraph.csv', export)
+        self.assertEqual(Book.objects.get(title='Abandoned').status, 'AB')
+
+
+class ExportTests(ReaderTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_session(3, notes='a,"b"\nc')
+
+    def test_csv_and_gzipped_ndjson(self):
+        response = self.client.get(reverse('export_history'), {'format': 'csv', 'table': 'sessions'})
+        self.assertFalse(response.is_async)
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('id,book_id'))
+        self.assertIn('"a,""b""\nc"', body)
+
+        response = self.client.get(reverse('export_history'), {'gzip': '1'})
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        self.assertEqual([json.loads(line)['type'] for line in lines], ['book', 'session'])
+        self.assertEqual(self.client.get(reverse('export_history'), {'format': 'xml'}).status_code, 404)
+
+    async def test_streams_asynchronously_under_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse('export_history'))
+        # An async iterator is sent chunk by chunk instead of being read into a list first
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual([json.loads(line)['type'] for line in body.splitlines()], ['book', 'session'])
+
+
+def image_upload(name, size, color='red', image_format='JPEG', mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, color).save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), f'image/{image_format.lower()}')
+
+
+class TemporaryMediaTestCase(ReaderTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class ImageDerivativeTests(TemporaryMediaTestCase):
+    def test_cover_upload_gets_derivatives(self):
+        response = self.client.post(reverse('edit_book', args=[self.book.pk]), {
+            'title': 'Book', 'author': 'Author', 'total_pages': 100, 'genre': 'FIC_LIT', 'status': 'TB',
+            'cover_image': image_upload('big.jpg', (3840, 2160)),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.book.refresh_from_db()
+        derivatives = os.path.join(self.media_root, os.path.dirname(self.book.cover_image.name), 'derivatives')
+        files = sorted(os.listdir(derivatives))
+        self.assertEqual(len(files), 4)
+        with Image.open(os.path.join(derivatives, files[0])) as image:
+            self.assertLessEqual(image.size[0], 480)
+        self.assertIn('.thumb.webp 240w', self.book.cover_webp_srcset)
+
+        response = self.client.get(reverse('book_list'))
+        self.assertContains(response, 'srcset')
+        self.assertNotContains(response, self.book.cover_image.name + '"')
+
+    def test_oversized_images_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            images.validate_image_upload(image_upload('huge.png', (8000, 6000), 0, 'PNG', 'L'))
+
+
+class ContentHashStorageTests(TemporaryMediaTestCase):
+    def add_books(self, count):
+        cover = image_upload('cover.jpeg', (600, 900), 'blue').read()
+        return [Book.objects.create(user=self.user, title=f'Copy {i}', author='Author', total_pages=10, genre='FIC_LIT',
+                                    cover_image=SimpleUploadedFile('cover.jpeg', cover, 'image/jpeg'))
+                for i in range(count)]
+
+    def derivatives(self, name):
+        return os.listdir(os.path.join(self.media_root, os.path.dirname(name), 'derivatives'))
+
+    def test_identical_uploads_share_one_file(self):
+        books = self.add_books(3)
+        name = books[0].cover_image.name
+        self.assertEqual({book.cover_image.name for book in books}, {name})
+        self.assertEqual(StoredFile.objects.get().references, 3)
+        self.assertIn('immutable', serve_media(RequestFactory().get('/'), name)['Cache-Control'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            books[0].delete()
+            books[1].delete()
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            books[2].delete()
+        self.assertFalse(StoredFile.objects.exists())
+        self.assertFalse(default_storage.exists(name))
+        self.assertEqual(self.derivatives(name), [])
+
+    def test_cascade_deletes_release_files(self):
+        name = self.add_books(2)[0].cover_image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertFalse(StoredFile.objects.exists())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_dedupe_legacy_uploads(self):
+        legacy = FileSystemStorage(location=self.media_root)
+        content = image_upload('cover.jpg', (300, 450), 'green').read()
+        names = [legacy.save(f'book_covers/cover{i}.jpg', ContentFile(content)) for i in range(2)]
+        for i, name in enumerate(names):
+            book = Book.objects.create(user=self.user, title=f'Legacy {i}', author='Author', total_pages=10, genre='FIC_LIT')
+            Book.objects.filter(pk=book.pk).update(cover_image=name)
+
+        call_command('dedupe_media', '--delete-originals', stdout=io.StringIO())
+        self.assertEqual(list(StoredFile.objects.values_list('references', flat=True)), [2])
+        self.assertFalse(any(legacy.exists(name) for name in names))
+        self.assertEqual(Book.objects.exclude(cover_image='').values('cover_image').distinct().count(), 1)
+
+
+class AsyncEndpointTests(ReaderTestCase):
+    async def test_chart_endpoints(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        await sync_to_async(self.add_session)(100)
+
+        response = await client.get(reverse('reading_progress_data'), {'days': 7})
+        self.assertEqual((response.json()['books_completed'], response.json()['total_pages']), (1, 100))
+        cached = await client.get(reverse('reading_progress_data'), {'days': 7}, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+        self.assertEqual((await client.get(reverse('genre_distribution'))).json()['data'], [1])
+        self.assertEqual((await client.get(reverse('book_status_data'))).json()['counts'], [1, 0, 0])
+        self.assertEqual((await client.get(reverse('reading_activity_data'))).json()['current_streak'], 1)
+        self.assertEqual((await AsyncClient().get(reverse('book_status_data'))).status_code, 302)
+
+    def test_window_moves_at_midnight(self):
+        url = reverse('reading_progress_data')
+        response = self.client.get(url, {'days': 7})
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with mock.patch('django.utils.timezone.localdate', return_value=tomorrow):
+            # No writes since, but yesterday's ETag and payload are stale
+            moved = self.client.get(url, {'days': 7}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(moved.status_code, 200)
+        self.assertEqual(moved.json()['dates'][-1], tomorrow.isoformat())
+
+
+class DashboardChartDataTests(ReaderTestCase):
+    def test_chart_data_is_embedded(self):
+        response = self.client.get(reverse('dashboard'))
+        embedded = re.search(r'<script id="dashboard-data" type="application/json">(.*?)</script>',
+                             response.content.decode(), re.S)
+        data = json.loads(embedded.group(1))
+        self.assertEqual(data['status']['counts'], [0, 0, 0])
+        self.assertEqual(data['genres']['data'], [1])
+        self.assertEqual(self.client.get(reverse('dashboard_data')).json(), data)
+
+
+class StaticAssetTests(ReaderTestCase):
+    def test_vendor_assets_only_where_used(self):
+        self.assertContains(self.client.get(reverse('dashboard')), 'chart.js@4.4.1', count=1)
+        response = self.client.get(reverse('book_list'))
+        self.assertNotContains(response, 'chart.js')
+        self.assertContains(response, 'confetti.browser.min.js', count=1)
+
+    def test_accept_encoding_is_parsed(self):
+        self.assertEqual(accepted_encodings('gzip;q=0.5, BR ; q=1.0, deflate;q=x,, identity'),
+                         {'gzip': 0.5, 'br': 1.0, 'deflate': 0.0, 'identity': 1.0})
+
+    def test_unvendored_assets_fail_the_checks(self):
+        with tempfile.TemporaryDirectory() as static_dir, override_settings(STATICFILES_DIRS=[static_dir]):
+            self.assertEqual([error.id for error in checks.run_checks(tags=[checks.Tags.staticfiles])],
+                             ['reading_tracker.W001'])
+            self.assertEqual([error.id for error in checks.run_checks(tags=[checks.Tags.staticfiles],
+                                                                      include_deployment_checks=True)],
+                             ['reading_tracker.W001', 'reading_tracker.E001'])
+            for path, _, _ in assets.VENDOR_ASSETS.values():
+                os.makedirs(os.path.join(static_dir, os.path.dirname(path)), exist_ok=True)
+                open(os.path.join(static_dir, path), 'w').close()
+            self.assertEqual(checks.run_checks(tags=[checks.Tags.staticfiles], include_deployment_checks=True), [])
+
+    def test_collected_files_are_fingerprinted_and_precompressed(self):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(STATIC_ROOT=static_root):
+            call_command('collectstatic', '--noinput', verbosity=0)
+            stylesheet = next(name for name in os.listdir(os.path.join(static_root, 'css'))
+                              if re.fullmatch(r'style\.[0-9a-f]{12}\.css', name))
+            response = self.client.get(f'/static/css/{stylesheet}', headers={'Accept-Encoding': 'gzip'})
+            body = b''.join(response.streaming_content)
+            self.assertEqual((response['Content-Encoding'], response['Content-Type']), ('gzip', 'text/css'))
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertTrue(gzip.decompress(body))
+            for header in ('gzip;q=0, identity', 'x-gzip, brotli', '*;q=0'):
+                with self.subTest(accept_encoding=header):
+                    response = self.client.get(f'/static/css/{stylesheet}', headers={'Accept-Encoding': header})
+                    self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertContains(self.client.get(reverse('dashboard')), f'/static/css/{stylesheet}')
+
+
+class KeysetPaginationTests(ReaderTestCase):
+    def titles(self, html):
+        return re.findall(r'<h5 class="card-title">(.*?)</h5>', html)
+
+    def next_url(self, html):
+        match = re.search(r'data-next-url="([^"]+)"', html)
+        return match.group(1).replace('&amp;', '&') if match else None
+
+    def test_book_list_pages_through_every_book(self):
+        Book.objects.bulk_create([Book(user=self.user, title=f'B{i}', author='Author', total_pages=10, genre='FIC_LIT')
+                                  for i in range(60)])
+        html = self.client.get(reverse('book_list')).content.decode()
+        seen = self.titles(html)
+        self.assertEqual(len(seen), 24)
+        url = self.next_url(html)
+        while url:
+            with self.assertNumQueries(3):  # session, user, page
+                html = self.client.get(url).content.decode()
+            self.assertFalse(set(seen) & set(self.titles(html)))
+            seen += self.titles(html)
+            url = self.next_url(html)
+        self.assertEqual(len(seen), 61)
+        self.assertEqual(self.client.get(reverse('book_list'), {'cursor': 'garbage'}).status_code, 200)
+
+    def test_book_sessions_and_series(self):
+        now = timezone.now()
+        ReadingSession.objects.bulk_create([
+            ReadingSession(user=self.user, book=self.book, pages_read=1,
+                           start_time=now - timedelta(days=i, hours=1), end_time=now - timedelta(days=i))
+            for i in range(400)])
+        response = self.client.get(reverse('book_detail', args=[self.book.pk]))
+        self.assertEqual(response.content.decode().count('Duration:'), 20)
+        series = response.context['chart_data']
+        self.assertLessEqual(len(series['dates']), 120)
+        self.assertEqual(sum(series['pages']), 400)
+        response = self.client.get(reverse('book_sessions_page', args=[self.book.pk]),
+                                   {'cursor': response.context['page'].next_cursor})
+        self.assertEqual(response.content.decode().count('Duration:'), 20)
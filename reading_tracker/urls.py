@@ -1,7 +1,13 @@
-from django.urls import path
-from . import views
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from . import views, api
 from django.contrib.auth import views as auth_views
 
+router = DefaultRouter()
+router.register('books', api.BookViewSet, basename='api-book')
+router.register('sessions', api.ReadingSessionViewSet, basename='api-session')
+router.register('goals', api.ReadingGoalViewSet, basename='api-goal')
+
 urlpatterns = [
     # Authentication URLs
     path('login/', auth_views.LoginView.as_view(
@@ -14,19 +20,33 @@ urlpatterns = [
     # Main pages
     path('', views.home, name='home'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('analytics/', views.analytics_dashboard, name='analytics_dashboard'),
     
     # Profile management
     path('profile/', views.profile, name='profile'),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
+    path('profile/export/', views.export_history, name='export_history'),
     
     # API endpoints for charts
     path('api/genre-distribution/', views.genre_distribution, name='genre_distribution'),
     path('api/book-status/', views.book_status_data, name='book_status_data'),
+    path('api/dashboard-data/', views.dashboard_data, name='dashboard_data'),
+    path('api/reading-activity/', views.reading_activity_data, name='reading_activity_data'),
+    path('api/reading-progress/', views.reading_progress_data, name='reading_progress_data'),
+    path('api/dashboard-events/', views.dashboard_events, name='dashboard_events'),
+    path('api/catalog/lookup/', views.catalog_lookup, name='catalog_lookup'),
+    path('api/catalog/autocomplete/', views.catalog_autocomplete, name='catalog_autocomplete'),
+    
+    # REST API
+    path('api/', include(router.urls)),
     
     # Book management
     path('books/', views.book_list, name='book_list'),
+    path('books/page/', views.book_list_page, name='book_list_page'),
     path('books/add/', views.add_book, name='add_book'),
+    path('books/import/', views.import_library, name='import_library'),
     path('books/<int:pk>/', views.book_detail, name='book_detail'),
+    path('books/<int:pk>/sessions/', views.book_sessions_page, name='book_sessions_page'),
     path('books/<int:pk>/edit/', views.edit_book, name='edit_book'),
     path('books/<int:pk>/delete/', views.delete_book, name='delete_book'),
     path('books/<int:pk>/complete/', views.mark_book_completed, name='mark_book_completed'),
@@ -42,4 +62,13 @@ urlpatterns = [
     path('goals/add/', views.add_goal, name='add_goal'),
     path('goals/<int:pk>/edit/', views.edit_goal, name='edit_goal'),
     path('goals/<int:pk>/delete/', views.delete_goal, name='delete_goal'),
+    
+    # Community
+    path('leaderboard/', views.leaderboard, name='leaderboard'),
+    
+    # Search
+    path('search/', views.search, name='search'),
+    
+    # Monitoring
+    path('metrics', views.metrics, name='metrics'),
 ]
\ No newline at end of file
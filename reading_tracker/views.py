@@ -1,16 +1,45 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.contrib.auth import login, logout
-from django.http import JsonResponse
-from django.db.models import Sum, Count, Avg
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, Http404
+from django.db.models import Sum, Count, Q
 from django.utils import timezone
-from datetime import timedelta, datetime
-from .models import Book, ReadingSession, ReadingGoal, UserProfile
+from datetime import timedelta
+from .models import Book, ReadingSession, ReadingGoal, UserProfile, DailyReadingStat, ReadingStreak, LeaderboardEntry
+from .streaks import day_timestamp
+from .goals import evaluate_goals
+from .analytics import build_analytics
+from . import cache as user_cache
+from . import metrics as request_metrics
 from .forms import (UserRegistrationForm, UserProfileForm, BookForm,
-                   ReadingSessionForm, ReadingGoalForm)
-import math
+                   ReadingSessionForm, ReadingGoalForm, LibraryImportForm)
+from .importers import import_library as run_library_import
+from . import catalog, charts, exports, leaderboards, live
+from .decorators import alogin_required
+from .storage import is_fingerprinted_name, is_hashed_name
+from .pagination import keyset_page
+from .search import BOOK_INDEX, SESSION_INDEX, RankedSearch
+from django.core.paginator import Paginator
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.static import serve
+import mimetypes
+import os
+import asyncio
+import codecs
+import logging
 from django.urls import reverse
+from asgiref.sync import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+BOOKS_PER_PAGE = 24
+SESSIONS_PER_PAGE = 20
+SEARCH_RESULTS_PER_PAGE = 20
+LEADERBOARD_PER_PAGE = 50
 
 def home(request):
     return render(request, 'reading_tracker/welcome.html')
@@ -32,164 +61,90 @@ def register(request):
     return render(request, 'registration/register.html', {'form': form})
 # ...existing code...
 
+def build_dashboard_context(user):
+    """Assemble the dashboard numbers for a user."""
+    # Core counters in one conditional aggregate; book page totals are
+    # kept up to date as sessions are written
+    counters = Book.objects.filter(user=user).aggregate(
+        total_books=Count('id'),
+        books_completed=Count('id', filter=Q(status='CO')),
+        total_pages=Sum('pages_read'),
+    )
+    
+    # Get currently reading book; its progress is stored on the book
+    current_book = Book.objects.filter(user=user, status='CR').first()
+    
+    # Get active reading goal - get the most recent one that's currently active
+    today = timezone.localdate()
+    active_goal = ReadingGoal.objects.filter(
+        user=user,
+        start_date__lte=today,
+        end_date__gte=today
+    ).order_by('-created_at').first()
+    
+    if active_goal:
+        evaluate_goals(user, [active_goal], today)
+    
+    return {
+        'total_books': counters['total_books'],
+        'books_completed': counters['books_completed'],
+        'total_pages': counters['total_pages'] or 0,
+        'active_goal': active_goal,
+        'current_book': current_book,
+        'streak': ReadingStreak.for_user(user),
+        # Embedded with json_script so the charts draw without extra requests
+        'chart_data': charts.dashboard_charts(user)
+    }
+
 @login_required
 def dashboard(request):
-    try:
-        # Get user's reading statistics
-        total_books = Book.objects.filter(user=request.user).count()
-        books_completed = Book.objects.filter(user=request.user, status='CO').count()
-        
-        # Calculate total pages read
-        total_pages = ReadingSession.objects.filter(user=request.user).aggregate(
-            total=Sum('pages_read'))['total'] or 0
-        
-        # Get currently reading book with progress
-        current_book = Book.objects.filter(user=request.user, status='CR').first()
-        if current_book:
-            # Calculate reading progress
-            pages_read = ReadingSession.objects.filter(
-                book=current_book
-            ).aggregate(total=Sum('pages_read'))['total'] or 0
-            
-            current_book.pages_read = pages_read
-            current_book.progress = round((pages_read / current_book.total_pages) * 100) if current_book.total_pages > 0 else 0
-        
-        # Debug: Print all goals for this user
-        all_goals = ReadingGoal.objects.filter(user=request.user)
-        print("\nAll goals for user:")
-        for goal in all_goals:
-            print(f"Goal ID: {goal.id}")
-            print(f"Period: {goal.start_date} to {goal.end_date}")
-            print(f"Target Pages: {goal.target_pages}")
-            print(f"Target Books: {goal.target_books}")
-            print(f"Created At: {goal.created_at}")
-            print("---")
-        
-        # Get active reading goal - get the most recent one that's currently active
-        today = timezone.now().date()
-        print(f"\nToday's date: {today}")
-        
-        active_goals = ReadingGoal.objects.filter(
-            user=request.user,
-            start_date__lte=today,
-            end_date__gte=today
-        )
-        
-        print("\nActive goals found:")
-        for goal in active_goals:
-            print(f"Goal ID: {goal.id}")
-            print(f"Period: {goal.start_date} to {goal.end_date}")
-        
-        active_goal = active_goals.order_by('-created_at').first()
-        
-        print("\nSelected active goal:")
-        if active_goal:
-            print(f"Goal ID: {active_goal.id}")
-            print(f"Period: {active_goal.start_date} to {active_goal.end_date}")
-            print(f"Target Pages: {active_goal.target_pages}")
-            print(f"Target Books: {active_goal.target_books}")
-
-            try:
-                # Calculate days remaining
-                days_remaining = (active_goal.end_date - today).days
-                
-                # Get pages and books read in the goal period
-                pages_read_in_period = active_goal.get_pages_read_in_period()
-                books_completed_in_period = active_goal.get_books_completed_in_period()
-                
-                print(f"\nProgress calculations:")
-                print(f"Days remaining: {days_remaining}")
-                print(f"Pages read in period: {pages_read_in_period}")
-                print(f"Books completed in period: {books_completed_in_period}")
-                
-                # Calculate remaining targets
-                pages_remaining = max(0, active_goal.target_pages - pages_read_in_period)
-                books_remaining = max(0, active_goal.target_books - books_completed_in_period) if active_goal.target_books else 0
-                
-                # Calculate daily targets needed
-                pages_needed_per_day = math.ceil(pages_remaining / days_remaining) if days_remaining > 0 else 0
-                
-                # Calculate progress percentages
-                pages_progress = (pages_read_in_period / active_goal.target_pages * 100) if active_goal.target_pages > 0 else 0
-                books_progress = (books_completed_in_period / active_goal.target_books * 100) if active_goal.target_books > 0 else 0
-                
-                print(f"Pages progress: {pages_progress}%")
-                print(f"Books progress: {books_progress}%")
-                
-                # Add goal progress information
-                active_goal.days_remaining = days_remaining
-                active_goal.pages_read = pages_read_in_period
-                active_goal.pages_remaining = pages_remaining
-                active_goal.pages_needed_per_day = pages_needed_per_day
-                active_goal.books_completed = books_completed_in_period
-                active_goal.books_remaining = books_remaining
-                active_goal.progress = min(round(pages_progress, 1), 100)
-                active_goal.books_progress = min(round(books_progress, 1), 100)
-                
-            except Exception as e:
-                print(f"\nGoal Progress Error: {str(e)}")
-                print(f"Goal ID: {active_goal.id}")
-                print(f"Goal Period: {active_goal.start_date} to {active_goal.end_date}")
-                print(f"Target Pages: {active_goal.target_pages}")
-                print(f"Target Books: {active_goal.target_books}")
-                messages.error(request, "There was an error calculating goal progress. Please check your goal settings.")
-                active_goal = None
-        else:
-            print("No active goal found")
-        
-        context = {
-            'total_books': total_books,
-            'books_completed': books_completed,
-            'total_pages': total_pages,
-            'active_goal': active_goal,
-            'current_book': current_book
-        }
-        
-        print("\nContext being sent to template:")
-        print(f"Active goal in context: {'Yes' if active_goal else 'No'}")
-        
-        return render(request, 'reading_tracker/dashboard.html', context)
-        
-    except Exception as e:
-        print(f"\nDashboard Error: {str(e)}")
-        messages.error(request, "There was an error loading the dashboard. Please try again.")
-        context = {
-            'total_books': 0,
-            'books_completed': 0,
-            'total_pages': 0,
-            'active_goal': None,
-            'current_book': None
-        }
-        return render(request, 'reading_tracker/dashboard.html', context)
+    context = user_cache.get_dashboard(request.user.id)
+    if context is None:
+        try:
+            context = build_dashboard_context(request.user)
+        except Exception:
+            logger.exception("Error building dashboard for user %s", request.user.id)
+            messages.error(request, "There was an error loading the dashboard. Please try again.")
+            context = {
+                'total_books': 0,
+                'books_completed': 0,
+                'total_pages': 0,
+                'active_goal': None,
+                'current_book': None
+            }
+            return render(request, 'reading_tracker/dashboard.html', context)
+        user_cache.set_dashboard(request.user.id, context)
+    
+    # Live updates need a long-lived stream, which only ASGI can serve
+    return render(request, 'reading_tracker/dashboard.html',
+                  {**context, 'live_updates': isinstance(request, ASGIRequest)})
 
 @login_required
 def profile(request):
     user_profile = get_object_or_404(UserProfile, user=request.user)
     books = Book.objects.filter(user=request.user)
-    reading_sessions = ReadingSession.objects.filter(user=request.user).order_by('-start_time')
+    daily_stats = DailyReadingStat.objects.filter(user=request.user)
     
     # Calculate reading statistics
     total_books = books.count()
     books_completed = books.filter(status='CO').count()
-    total_pages_read = reading_sessions.aggregate(total=Sum('pages_read'))['total'] or 0
+    total_pages_read = daily_stats.aggregate(total=Sum('pages'))['total'] or 0
     
     # Prepare reading progress data for the chart
-    last_30_days = reading_sessions.filter(
-        start_time__gte=timezone.now() - timezone.timedelta(days=30)
-    ).values('start_time__date').annotate(
-        pages=Sum('pages_read')
-    ).order_by('start_time__date')
+    last_30_days = daily_stats.filter(
+        date__gte=timezone.localdate() - timedelta(days=30)
+    ).values('date', 'pages').order_by('date')
     
     chart_data = {
-        'dates': [session['start_time__date'].strftime('%Y-%m-%d') for session in last_30_days],
-        'pages': [session['pages'] for session in last_30_days]
+        'dates': [day['date'].strftime('%Y-%m-%d') for day in last_30_days],
+        'pages': [day['pages'] for day in last_30_days]
     }
     
     # Get active reading goals
-    active_goals = ReadingGoal.objects.filter(
+    active_goals = evaluate_goals(request.user, ReadingGoal.objects.filter(
         user=request.user,
-        end_date__gte=timezone.now().date()
-    )
+        end_date__gte=timezone.localdate()
+    ))
     
     return render(request, 'reading_tracker/profile.html', {
         'profile': user_profile,
@@ -200,6 +155,39 @@ def profile(request):
         'active_goals': active_goals
     })
 
+@login_required
+def export_history(request):
+    """Stream the user's books, sessions and goals as CSV or NDJSON, optionally gzipped.
+
+    CSV holds one table (``?table=books|sessions|goals``); NDJSON holds all
+    three unless ``table`` is given, with a ``type`` field on every line.
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    table = request.GET.get('table')
+    if export_format not in ('csv', 'ndjson') or (table and table not in exports.TABLES):
+        raise Http404("Unknown export format or table.")
+    
+    if export_format == 'csv':
+        table = table or 'sessions'
+        lines = exports.csv_lines(request.user, table)
+        content_type = 'text/csv'
+        filename = f'reading-{table}.csv'
+    else:
+        lines = exports.ndjson_lines(request.user, [table] if table else list(exports.TABLES))
+        content_type = 'application/x-ndjson'
+        filename = f'reading-{table or "history"}.ndjson'
+    
+    if request.GET.get('gzip') in ('1', 'true'):
+        lines = exports.gzip_stream(lines)
+        content_type = 'application/gzip'
+        filename += '.gz'
+    
+    if isinstance(request, ASGIRequest):
+        lines = exports.aiterate(lines)
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @login_required
 def edit_profile(request):
     profile = get_object_or_404(UserProfile, user=request.user)
@@ -215,8 +203,16 @@ def edit_profile(request):
 
 @login_required
 def book_list(request):
-    books = Book.objects.filter(user=request.user)
-    return render(request, 'reading_tracker/book_list.html', {'books': books})
+    page = keyset_page(Book.objects.filter(user=request.user), 'created_at',
+                       request.GET.get('cursor'), BOOKS_PER_PAGE)
+    return render(request, 'reading_tracker/book_list.html', {'page': page})
+
+@login_required
+def book_list_page(request):
+    """Next page of book cards as an HTML fragment, for infinite scroll."""
+    page = keyset_page(Book.objects.filter(user=request.user), 'created_at',
+                       request.GET.get('cursor'), BOOKS_PER_PAGE)
+    return render(request, 'reading_tracker/includes/book_cards.html', {'page': page})
 
 @login_required
 def add_book(request):
@@ -232,31 +228,69 @@ def add_book(request):
         form = BookForm()
     return render(request, 'reading_tracker/add_book.html', {'form': form})
 
+@login_required
+def import_library(request):
+    if request.method == 'POST':
+        form = LibraryImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            # Decode the upload line by line so large exports are never held in memory
+            lines = codecs.iterdecode(form.cleaned_data['file'], 'utf-8-sig')
+            try:
+                result = run_library_import(request.user, lines)
+            except (ValueError, UnicodeDecodeError) as e:
+                form.add_error('file', str(e))
+            else:
+                messages.success(request, f'Imported {result.books} book(s) and {result.sessions} reading session(s). '
+                                          f'Skipped {result.skipped} row(s).')
+                return redirect('book_list')
+    else:
+        form = LibraryImportForm()
+    return render(request, 'reading_tracker/import_library.html', {'form': form})
+
 @login_required
 def book_detail(request, pk):
     book = get_object_or_404(Book, pk=pk, user=request.user)
-    sessions = ReadingSession.objects.filter(book=book).order_by('-start_time')
+    # First page of sessions; the rest are loaded as the user scrolls
+    page = keyset_page(ReadingSession.objects.filter(book=book), 'start_time',
+                       request.GET.get('cursor'), SESSIONS_PER_PAGE)
     
-    # Calculate reading progress
-    total_pages_read = sessions.aggregate(Sum('pages_read'))['pages_read__sum'] or 0
-    reading_progress = (total_pages_read / book.total_pages) * 100 if book.total_pages > 0 else 0
-    
-    # Get reading sessions data for the chart
-    sessions_data = list(sessions.values('start_time', 'pages_read'))
-    chart_data = {
-        'dates': [session['start_time'].strftime('%Y-%m-%d') for session in sessions_data],
-        'pages': [session['pages_read'] for session in sessions_data]
-    }
+    # Per-day totals, downsampled, rather than one point per session
+    chart_data = charts.book_session_series(book)
     
     return render(request, 'reading_tracker/book_detail.html', {
         'book': book,
-        'sessions': sessions,
-        'reading_progress': reading_progress,
-        'pages_read': total_pages_read,
+        'page': page,
+        'reading_progress': book.progress,
+        'pages_read': book.pages_read,
         'chart_data': chart_data,
         'just_completed': request.GET.get('just_completed') == 'true'
     })
 
+@login_required
+def book_sessions_page(request, pk):
+    """Next page of a book's sessions as an HTML fragment, for infinite scroll."""
+    book = get_object_or_404(Book, pk=pk, user=request.user)
+    page = keyset_page(ReadingSession.objects.filter(book=book), 'start_time',
+                       request.GET.get('cursor'), SESSIONS_PER_PAGE)
+    return render(request, 'reading_tracker/includes/session_items.html', {'book': book, 'page': page})
+
+@login_required
+def search(request):
+    """Ranked full-text search over the user's books or session notes."""
+    query = request.GET.get('q', '').strip()
+    kind = 'sessions' if request.GET.get('type') == 'sessions' else 'books'
+    books = RankedSearch(BOOK_INDEX, query, request.user)
+    sessions = RankedSearch(SESSION_INDEX, query, request.user, ReadingSession.objects.select_related('book'))
+    
+    page = Paginator(sessions if kind == 'sessions' else books, SEARCH_RESULTS_PER_PAGE).get_page(request.GET.get('page'))
+    return render(request, 'reading_tracker/search.html', {
+        'query': query,
+        'kind': kind,
+        'page': page,
+        'book_count': books.count(),
+        'session_count': sessions.count(),
+    })
+
 @login_required
 def edit_book(request, pk):
     book = get_object_or_404(Book, pk=pk, user=request.user)
@@ -311,17 +345,14 @@ def add_reading_session(request, book_id):
             session.book = book
             
             # Validate pages read against book's total pages
-            total_pages_read = ReadingSession.objects.filter(book=book).aggregate(
-                total=Sum('pages_read'))['total'] or 0
-            if total_pages_read + session.pages_read > book.total_pages:
+            if book.pages_read + session.pages_read > book.total_pages:
                 form.add_error('pages_read', 
                     f'Total pages read would exceed book\'s total pages ({book.total_pages})')
             else:
+                # Saving the session updates the book's progress and status
+                was_completed = book.status == 'CO'
                 session.save()
-                
-                # Update book progress and status
-                progress, just_completed = book.calculate_reading_progress()
-                book.save()
+                just_completed = not was_completed and book.status == 'CO'
                 
                 messages.success(request, 'Reading session added successfully.')
                 if just_completed:
@@ -369,7 +400,7 @@ def delete_session(request, pk):
 
 @login_required
 def reading_goals(request):
-    goals = ReadingGoal.objects.filter(user=request.user)
+    goals = evaluate_goals(request.user, ReadingGoal.objects.filter(user=request.user))
     return render(request, 'reading_tracker/goals.html', {'goals': goals})
 
 @login_required
@@ -412,19 +443,29 @@ def delete_goal(request, pk):
 def reading_progress(request):
     return render(request, 'reading_tracker/reading_progress.html')
 
-@login_required
-def reading_progress_data(request):
+@alogin_required
+@user_cache.versioned_json('reading-progress')
+async def reading_progress_data(request):
     """API endpoint for reading progress charts"""
-    days = int(request.GET.get('days', 30))
-    start_date = timezone.now().date() - timedelta(days=days)
-    
-    # Get daily pages read
-    daily_pages = ReadingSession.objects.filter(
-        user=request.user,
-        start_time__date__gte=start_date
-    ).values('start_time__date').annotate(
-        pages=Sum('pages_read')
-    ).order_by('start_time__date')
+    try:
+        days = max(1, min(int(request.GET.get('days', 30)), 3650))
+    except ValueError:
+        days = 30
+    today = timezone.localdate()
+    start_date = today - timedelta(days=days)
+    
+    async def daily_pages():
+        rows = DailyReadingStat.objects.filter(
+            user=request.user,
+            date__gte=start_date
+        ).values_list('date', 'pages')
+        return {day: pages async for day, pages in rows}
+    
+    # The rollups and the book count are independent, so fetch them together
+    daily_data, books_completed = await asyncio.gather(
+        daily_pages(),
+        Book.objects.filter(user=request.user, status='CO').acount(),
+    )
     
     # Fill in missing dates with 0 pages
     dates = []
@@ -432,9 +473,7 @@ def reading_progress_data(request):
     total_pages = 0
     
     current_date = start_date
-    daily_data = {item['start_time__date']: item['pages'] for item in daily_pages}
-    
-    while current_date <= timezone.now().date():
+    while current_date <= today:
         dates.append(current_date.strftime('%Y-%m-%d'))
         pages = daily_data.get(current_date, 0)
         daily_values.append(pages)
@@ -444,150 +483,76 @@ def reading_progress_data(request):
     # Calculate average pages per day
     avg_pages = round(total_pages / len(dates), 1) if dates else 0
     
-    return JsonResponse({
+    return {
         'dates': dates,
         'daily_pages': daily_values,
         'total_pages': total_pages,
-        'avg_pages_per_day': avg_pages
-    })
+        'avg_pages_per_day': avg_pages,
+        'books_completed': books_completed
+    }
 
-@login_required
-def book_status_data(request):
+@alogin_required
+@user_cache.versioned_json('book-status')
+async def book_status_data(request):
     """API endpoint for book status chart"""
-    status_counts = Book.objects.filter(user=request.user).values('status').annotate(
-        count=Count('status')
-    )
-    
-    # Initialize all possible statuses with 0
-    data = {
-        'labels': ['Completed', 'Currently Reading', 'Abandoned'],
-        'counts': [0, 0, 0],
-        'colors': ['#4BC0C0', '#FF9F40', '#FF6384']  # Green, Orange, Red
-    }
-    
-    # Map database status codes to array indices
-    status_map = {
-        'CO': 0,  # Completed
-        'CR': 1,  # Currently Reading
-        'AB': 2   # Abandoned
-    }
-    
-    # Fill in actual counts
-    for status in status_counts:
-        if status['status'] in status_map:
-            data['counts'][status_map[status['status']]] = status['count']
-    
-    return JsonResponse(data)
+    return charts.status_chart(await charts.alist(charts.status_counts(request.user)))
 
-@login_required
-def genre_distribution(request):
+@alogin_required
+@user_cache.versioned_json('genre-distribution')
+async def genre_distribution(request):
     """API endpoint for genre distribution chart"""
-    books = Book.objects.filter(user=request.user)
-    
-    # Get genre counts
-    genre_stats = books.values('genre').annotate(
-        count=Count('id')
-    ).order_by('-count')
-    
-    # Prepare data for chart
-    genres = []
-    counts = []
-    colors = ['#36A2EB', '#4BC0C0', '#FF9F40', '#FF6384', '#9966FF', '#FFCD56']
-    
-    for i, stat in enumerate(genre_stats):
-        genre_name = dict(Book._meta.get_field('genre').choices)[stat['genre']]
-        genres.append(genre_name)
-        counts.append(stat['count'])
-    
-    return JsonResponse({
-        'labels': genres,
-        'data': counts,
-        'colors': colors[:len(genres)]
-    })
+    return charts.genre_chart(await charts.alist(charts.genre_counts(request.user)))
+
+@alogin_required
+@user_cache.versioned_json('dashboard-data')
+async def dashboard_data(request):
+    """Every dashboard chart dataset in one response"""
+    return await charts.adashboard_charts(request.user)
+
+def dashboard_snapshot(user):
+    """Live dashboard values, built from the same cache entry as the dashboard page."""
+    context = user_cache.get_dashboard(user.id)
+    if context is None:
+        context = build_dashboard_context(user)
+        user_cache.set_dashboard(user.id, context)
+    return live.snapshot(context)
+
+@alogin_required
+async def dashboard_events(request):
+    """Server-Sent Events stream of dashboard changes (ASGI only)"""
+    if not isinstance(request, ASGIRequest):
+        # WSGI would read the whole stream before sending any of it, holding
+        # a worker thread for live.MAX_AGE; 204 stops EventSource reconnecting
+        return HttpResponse(status=204)
+    user = request.user
+    response = StreamingHttpResponse(
+        live.stream(
+            user.id,
+            lambda: sync_to_async(dashboard_snapshot)(user),
+            lambda: user_cache.adata_version(user.id),
+        ),
+        content_type='text/event-stream',
+    )
+    patch_cache_control(response, private=True, no_cache=True)
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @login_required
 def analytics_dashboard(request):
     # Time range for analysis
-    days = int(request.GET.get('days', 30))
-    start_date = timezone.now() - timedelta(days=days)
-    
-    # Get reading sessions for the period
-    sessions = ReadingSession.objects.filter(
-        user=request.user,
-        start_time__gte=start_date
+    try:
+        days = max(1, min(int(request.GET.get('days', 30)), 3650))
+    except ValueError:
+        days = 30
+    
+    # Cached per data version and day; any book or session write invalidates it
+    context = user_cache.get_or_build(
+        request.user.id,
+        f'analytics:{days}:{timezone.localdate().isoformat()}',
+        lambda: build_analytics(request.user, days),
+        user_cache.ANALYTICS_TIMEOUT,
     )
-    
-    # Daily pages read
-    daily_pages = sessions.values('start_time__date').annotate(
-        pages=Sum('pages_read')
-    ).order_by('start_time__date')
-    
-    # Reading patterns
-    time_patterns = sessions.annotate(
-        hour=ExtractHour('start_time')
-    ).values('hour').annotate(
-        count=Count('id'),
-        avg_pages=Avg('pages_read')
-    ).order_by('hour')
-    
-    weekday_patterns = sessions.annotate(
-        weekday=ExtractWeekDay('start_time')
-    ).values('weekday').annotate(
-        count=Count('id'),
-        avg_pages=Avg('pages_read')
-    ).order_by('weekday')
-    
-    # Genre analysis
-    genre_stats = Book.objects.filter(
-        user=request.user,
-        readingsession_start_time_gte=start_date
-    ).values('genre').annotate(
-        total_pages=Sum('readingsession__pages_read'),
-        total_time=Sum('readingsession_end_time') - Sum('readingsession_start_time'),
-        book_count=Count('id', distinct=True)
-    ).order_by('-total_pages')
-    
-    # Reading streaks
-    streak_data = {}
-    for session in sessions:
-        date_str = session.start_time.date().isoformat()
-        if date_str in streak_data:
-            streak_data[date_str] += session.pages_read
-        else:
-            streak_data[date_str] = session.pages_read
-    
-    # Mood and comprehension analysis
-    mood_stats = sessions.exclude(mood='').values('mood').annotate(
-        count=Count('id'),
-        avg_pages=Avg('pages_read')
-    ).order_by('mood')
-    
-    comprehension_stats = sessions.exclude(comprehension='').values('comprehension').annotate(
-        count=Count('id'),
-        avg_pages=Avg('pages_read')
-    ).order_by('comprehension')
-    
-    # Calculate total statistics
-    total_stats = {
-        'total_books': Book.objects.filter(user=request.user, status='CO').count(),
-        'total_pages': sessions.aggregate(Sum('pages_read'))['pages_read__sum'] or 0,
-        'total_time': sum((s.duration().total_seconds() / 3600) for s in sessions),
-        'avg_pages_per_session': sessions.aggregate(Avg('pages_read'))['pages_read__avg'] or 0,
-        'total_sessions': sessions.count(),
-    }
-    
-    context = {
-        'total_stats': total_stats,
-        'daily_pages': list(daily_pages),
-        'time_patterns': list(time_patterns),
-        'weekday_patterns': list(weekday_patterns),
-        'genre_stats': list(genre_stats),
-        'streak_data': streak_data,
-        'mood_stats': list(mood_stats),
-        'comprehension_stats': list(comprehension_stats),
-        'days': days,
-    }
-    
     return render(request, 'reading_tracker/analytics.html', context)
 
 @login_required
@@ -596,80 +561,78 @@ def user_logout(request):
     messages.success(request, "You have been logged out.")
     return redirect('login')
 
-@login_required
-def reading_activity_data(request):
+@alogin_required
+@user_cache.versioned_json('reading-activity')
+async def reading_activity_data(request):
     """API endpoint for reading activity heatmap"""
-    try:
-        # Get data for the last 365 days
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=365)
-        
-        # Get daily reading activity
-        daily_activity = ReadingSession.objects.filter(
-            user=request.user,
-            start_time__date__gte=start_date
-        ).values('start_time__date').annotate(
-            pages=Sum('pages_read')
-        )
-        
-        # Convert to the format expected by Cal-Heatmap
-        activity_data = {}
-        current_streak = 0
-        longest_streak = 0
-        temp_streak = 0
-        last_active_date = None
-        
-        # Process all dates in range
-        current_date = start_date
-        while current_date <= end_date:
-            # Find pages read for this date
-            date_activity = next(
-                (item for item in daily_activity if item['start_time__date'] == current_date),
-                None
-            )
-            pages = date_activity['pages'] if date_activity else 0
-            
-            # Add to activity data if there was reading activity
-            if pages > 0:
-                # Convert date to Unix timestamp (seconds since epoch)
-                timestamp = int(datetime.combine(current_date, datetime.min.time()).timestamp())
-                activity_data[str(timestamp)] = pages
-                
-                # Update streak information
-                if last_active_date is None or (current_date - last_active_date).days == 1:
-                    temp_streak += 1
-                else:
-                    temp_streak = 1
-                
-                if temp_streak > longest_streak:
-                    longest_streak = temp_streak
-                
-                last_active_date = current_date
-                
-                # Update current streak if it includes today
-                if current_date == end_date:
-                    current_streak = temp_streak
-            else:
-                if current_date == end_date and last_active_date == current_date - timedelta(days=1):
-                    current_streak = temp_streak
-                temp_streak = 0
-            
-            current_date += timedelta(days=1)
-        
-        print("Activity Data:", activity_data)  # Debug print
-        
-        return JsonResponse({
-            'current_streak': current_streak,
-            'longest_streak': longest_streak,
-            'data': activity_data
-        })
-    except Exception as e:
-        print(f"Reading Activity Error: {str(e)}")  # Debug print
-        return JsonResponse({
-            'current_streak': 0,
-            'longest_streak': 0,
-            'data': {}
-        })
+    # Get data for the last 365 days
+    end_date = timezone.localdate()
+    start_date = end_date - timedelta(days=365)
+    
+    # Get daily reading activity (at most one rollup row per day)
+    daily_activity = DailyReadingStat.objects.filter(
+        user=request.user,
+        date__gte=start_date,
+        date__lte=end_date,
+        pages__gt=0
+    ).values_list('date', 'pages')
+    
+    async def activity():
+        # Cal-Heatmap format: Unix timestamp -> pages
+        return {str(day_timestamp(day)): pages async for day, pages in daily_activity}
+    
+    # Streaks are kept up to date as sessions are written
+    activity_data, streak = await asyncio.gather(
+        activity(),
+        ReadingStreak.objects.filter(user=request.user).afirst(),
+    )
+    streak = streak or ReadingStreak(user=request.user)
+    
+    return {
+        'current_streak': streak.current_streak,
+        'longest_streak': streak.longest_streak,
+        'data': activity_data
+    }
+
+@login_required
+def leaderboard(request):
+    """Top public readers on one board, plus where the current user stands."""
+    board = request.GET.get('board', 'week')
+    if board not in leaderboards.BOARDS:
+        raise Http404
+    current, previous = leaderboards.tracked_periods(board)
+    period = previous if request.GET.get('period') == 'previous' and board != leaderboards.STREAK_BOARD else current
+    
+    page = Paginator(leaderboards.Standings(board, period), LEADERBOARD_PER_PAGE).get_page(request.GET.get('page'))
+    mine = LeaderboardEntry.objects.filter(board=board, period=period, user=request.user).first()
+    return render(request, 'reading_tracker/leaderboard.html', {
+        'boards': leaderboards.BOARDS,
+        'board': board,
+        'period': period,
+        'period_last': leaderboards.period_end(board, period) - timedelta(days=1) if board != leaderboards.STREAK_BOARD else None,
+        'is_previous': period != current,
+        'page': page,
+        'my_entry': mine,
+        'my_rank': leaderboards.rank(board, period, mine.score) if mine else None,
+        'is_public': UserProfile.objects.filter(user=request.user, is_public=True).exists(),
+    })
+
+@login_required
+def catalog_lookup(request):
+    """Offline catalog metadata for ``?isbn=``, for auto-filling the book form."""
+    entry = catalog.lookup_isbn(request.GET.get('isbn', ''))
+    if entry is None:
+        return JsonResponse({'error': 'No catalog entry for this ISBN.'}, status=404)
+    response = JsonResponse(entry)
+    patch_cache_control(response, private=True, max_age=86400)
+    return response
+
+@login_required
+def catalog_autocomplete(request):
+    """Catalog entries whose title or author starts with ``?q=``."""
+    response = JsonResponse({'results': catalog.autocomplete(request.GET.get('q', ''))})
+    patch_cache_control(response, private=True, max_age=3600)
+    return response
 
 @login_required
 def mark_book_completed(request, pk):
@@ -694,3 +657,64 @@ def mark_book_completed(request, pk):
     
     # GET request - show confirmation page
     return render(request, 'reading_tracker/mark_book_completed.html', {'book': book})
+
+@staff_member_required
+def metrics(request):
+    """Request histograms in Prometheus text format (staff only)."""
+    return HttpResponse(request_metrics.render_prometheus(),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def serve_media(request, path):
+    """Serve uploaded media, marking content-hashed files as immutable."""
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_hashed_name(path):
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    return response
+
+# Precompressed variants written by collectstatic, in order of preference
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def accepted_encodings(header):
+    """Parse an Accept-Encoding header into ``{coding: q}``; malformed q-values count as 0."""
+    codings = {}
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+def serve_static(request, path):
+    """Serve collected static files, preferring precompressed copies.
+
+    The client's most preferred encoding wins (ties go to
+    ``STATIC_ENCODINGS`` order); ``q=0`` rules an encoding out.
+    Fingerprinted names never change content, so they are cached for a year.
+    """
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    encoding = None
+    served_path = path
+    candidates = [(accepted.get(name, accepted.get('*', 0)), name, suffix) for name, suffix in STATIC_ENCODINGS]
+    for q, name, suffix in sorted(candidates, key=lambda candidate: -candidate[0]):
+        if q > 0 and os.path.isfile(os.path.join(settings.STATIC_ROOT, path + suffix)):
+            encoding, served_path = name, path + suffix
+            break
+
+    response = serve(request, served_path, document_root=settings.STATIC_ROOT)
+    if encoding:
+        content_type, _ = mimetypes.guess_type(path)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if is_fingerprinted_name(path):
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    return response
@@ -1,6 +1,8 @@
-// Chart.js default configuration
-Chart.defaults.font.family = '-apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif';
-Chart.defaults.color = '#666';
+// Chart.js default configuration (Chart.js is only loaded on chart pages)
+if (window.Chart) {
+    Chart.defaults.font.family = '-apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif';
+    Chart.defaults.color = '#666';
+}
 
 // Utility function to format dates
 function formatDate(date) {
@@ -184,8 +186,101 @@ class ReadingTimer {
 // Initialize reading timer
 const readingTimer = new ReadingTimer();
 
+// Infinite scroll: the last element of a [data-infinite-scroll] container
+// carries data-next-url, the fragment with the next page (and its own
+// sentinel if there are more)
+function initInfiniteScroll(container) {
+    if (!('IntersectionObserver' in window)) return;  // keep the "Load more" links
+
+    const observer = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            if (!entry.isIntersecting) return;
+            const sentinel = entry.target;
+            observer.unobserve(sentinel);
+            fetch(sentinel.dataset.nextUrl, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+                .then(res => {
+                    if (!res.ok) throw new Error(`${res.status} ${res.statusText}`);
+                    return res.text();
+                })
+                .then(html => {
+                    sentinel.insertAdjacentHTML('afterend', html);
+                    sentinel.remove();
+                    container.querySelectorAll('[data-next-url]').forEach(el => observer.observe(el));
+                })
+                .catch(error => {
+                    // Keep the sentinel and its "Load more" link, and retry with backoff
+                    const failures = Number(sentinel.dataset.failures || 0) + 1;
+                    sentinel.dataset.failures = failures;
+                    console.error('Loading the next page failed:', error);
+                    setTimeout(() => observer.observe(sentinel), Math.min(1000 * 2 ** failures, 60000));
+                });
+        });
+    }, { rootMargin: '600px' });
+
+    container.querySelectorAll('[data-next-url]').forEach(el => observer.observe(el));
+}
+
+// Live updates: a [data-live-url] element subscribes to a Server-Sent
+// Events stream of changed values. Elements inside it name the value they
+// show with data-live="path.to.value" (data-live-width for progress bars);
+// a [data-live-section] is rendered only when its value is set (and, with
+// data-live-id, for one object), so a section appearing, disappearing or
+// switching objects reloads the page instead.
+const liveFormats = {
+    date: value => new Date(value + 'T00:00:00').toLocaleDateString('en-US', { month: 'short', day: '2-digit', year: 'numeric' }),
+    days: value => `${value} day${value === 1 ? '' : 's'}`,
+    percent: value => `${Number(value).toFixed(1)}%`
+};
+
+function liveValue(data, path) {
+    return path.split('.').reduce((value, key) => (value == null ? undefined : value[key]), data);
+}
+
+function applyLiveDelta(root, delta) {
+    const changed = path => path.split('.')[0] in delta;
+
+    const sectionsMoved = Array.from(root.querySelectorAll('[data-live-section]')).some(section => {
+        const path = section.dataset.liveSection;
+        if (!changed(path)) return false;
+        const value = liveValue(delta, path);
+        if (Boolean(value) !== (section.dataset.livePresent === 'true')) return true;
+        return Boolean(value) && 'liveId' in section.dataset && String(value.id) !== section.dataset.liveId;
+    });
+    if (sectionsMoved) {
+        location.reload();
+        return;
+    }
+
+    root.querySelectorAll('[data-live]').forEach(el => {
+        const path = el.dataset.live;
+        const value = liveValue(delta, path);
+        if (!changed(path) || value === undefined) return;
+        const format = liveFormats[el.dataset.liveFormat];
+        el.textContent = format ? format(value) : value;
+    });
+    root.querySelectorAll('[data-live-width]').forEach(el => {
+        const path = el.dataset.liveWidth;
+        const value = liveValue(delta, path);
+        if (!changed(path) || value === undefined) return;
+        el.style.width = `${value}%`;
+        el.setAttribute('aria-valuenow', value);
+    });
+    // Pages with more than text to patch (e.g. charts) listen for this
+    root.dispatchEvent(new CustomEvent('live:update', { detail: delta }));
+}
+
+function initLiveUpdates(root) {
+    if (!('EventSource' in window)) return;
+    const source = new EventSource(root.dataset.liveUrl);
+    source.addEventListener('dashboard', event => applyLiveDelta(root, JSON.parse(event.data)));
+    window.addEventListener('pagehide', () => source.close());
+}
+
 // Event listeners
 document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('[data-infinite-scroll]').forEach(initInfiniteScroll);
+    document.querySelectorAll('[data-live-url]').forEach(initLiveUpdates);
+
     // Initialize Bootstrap tooltips
     const tooltips = document.querySelectorAll('[data-bs-toggle="tooltip"]');
     tooltips.forEach(tooltip => new bootstrap.Tooltip(tooltip));